@@ -0,0 +1,187 @@
+"""게이트웨이 모드별 메모리/준비 시간 측정
+
+기본 모드와 경량 게이트웨이 모드(LEAN_GATEWAY=1)를 각각 별도 프로세스로 실행하고
+가짜 READY/GUILD_CREATE/MESSAGE_CREATE 페이로드를 discord.py 파서에 직접 넣어
+N개 길드를 받은 뒤의 RSS와 ready 이벤트까지 걸린 시간을 비교.
+메시지 이벤트는 해당 모드의 인텐트로 실제 수신되는 경우에만 넣음.
+
+    python benchmarks/gateway_memory.py --guilds 1000 --members 200 --messages 50
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import itertools
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+READY_TIMEOUT = 0.2
+
+_ids = itertools.count(10 ** 17)
+
+def rss_kb():
+    """현재 프로세스의 RSS (KB)"""
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def user_payload(user_id):
+    return {'id': str(user_id), 'username': f'user{user_id % 100000}', 'discriminator': '0', 'avatar': None, 'global_name': None}
+
+def guild_payload(guild_id, members, channels):
+    """채널/멤버/음성 상태가 포함된 GUILD_CREATE 페이로드"""
+    text_ids = [next(_ids) for _ in range(channels)]
+    voice_ids = [next(_ids) for _ in range(channels)]
+    member_ids = [next(_ids) for _ in range(members)]
+
+    channel_data = [
+        {'id': str(channel_id), 'type': 0, 'name': f'text-{i}', 'position': i, 'guild_id': str(guild_id), 'permission_overwrites': []}
+        for i, channel_id in enumerate(text_ids)
+    ] + [
+        {'id': str(channel_id), 'type': 2, 'name': f'voice-{i}', 'position': i, 'guild_id': str(guild_id),
+         'permission_overwrites': [], 'bitrate': 64000, 'user_limit': 0}
+        for i, channel_id in enumerate(voice_ids)
+    ]
+
+    # 멤버의 10%는 음성 채널에 있는 상태
+    voice_states = [
+        {'user_id': str(member_id), 'channel_id': str(voice_ids[i % len(voice_ids)]), 'session_id': 'x',
+         'deaf': False, 'mute': False, 'self_deaf': False, 'self_mute': False, 'self_video': False, 'suppress': False}
+        for i, member_id in enumerate(member_ids[::10])
+    ]
+
+    data = {
+        'id': str(guild_id),
+        'name': f'guild-{guild_id % 100000}',
+        'owner_id': str(member_ids[0]),
+        'member_count': members,
+        'large': members > 250,
+        'unavailable': False,
+        'roles': [{'id': str(guild_id), 'name': '@everyone', 'permissions': '0', 'position': 0, 'color': 0,
+                   'hoist': False, 'managed': False, 'mentionable': False}],
+        'emojis': [],
+        'stickers': [],
+        'features': [],
+        'channels': channel_data,
+        'threads': [],
+        'members': [
+            {'user': user_payload(member_id), 'roles': [], 'joined_at': '2024-01-01T00:00:00+00:00', 'deaf': False, 'mute': False, 'flags': 0}
+            for member_id in member_ids
+        ],
+        'voice_states': voice_states,
+        'presences': []
+    }
+    return data, text_ids, member_ids
+
+def message_payload(guild_id, channel_id, member_id):
+    return {
+        'id': str(next(_ids)), 'channel_id': str(channel_id), 'guild_id': str(guild_id),
+        'author': user_payload(member_id), 'member': {'roles': [], 'joined_at': '2024-01-01T00:00:00+00:00', 'deaf': False, 'mute': False, 'flags': 0},
+        'content': 'hello world', 'timestamp': '2024-01-01T00:00:00+00:00', 'edited_timestamp': None,
+        'tts': False, 'mention_everyone': False, 'mentions': [], 'mention_roles': [], 'attachments': [],
+        'embeds': [], 'pinned': False, 'type': 0
+    }
+
+async def feed(args):
+    """자식 프로세스 - main을 import하고 가짜 게이트웨이 이벤트를 파서에 넣음"""
+    baseline = rss_kb()
+    started = time.perf_counter()
+    import main
+    import_seconds = time.perf_counter() - started
+    after_import = rss_kb()
+
+    # 로그인 없이 루프 관련 객체만 초기화 (bot.start()가 하는 것과 동일)
+    await main.bot._async_setup_hook()
+    state = main.bot._connection
+    state.guild_ready_timeout = READY_TIMEOUT
+    ready = asyncio.Event()
+
+    def dispatch(event, *event_args):
+        # 캐시 비용만 측정 - 봇 핸들러(on_ready의 명령어 동기화, 웹 서버 등)는 실행하지 않음
+        if event == 'ready':
+            ready.set()
+
+    state.dispatch = dispatch
+
+    guild_ids = [next(_ids) for _ in range(args.guilds)]
+    bot_id = next(_ids)
+    started = time.perf_counter()
+    state.parse_ready({
+        'user': {**user_payload(bot_id), 'bot': True},
+        'guilds': [{'id': str(guild_id), 'unavailable': True} for guild_id in guild_ids],
+        'session_id': 'benchmark',
+        'application': {'id': str(bot_id), 'flags': 0}
+    })
+
+    receives_messages = state._intents.guild_messages
+    messages = 0
+    for guild_id in guild_ids:
+        data, text_ids, member_ids = guild_payload(guild_id, args.members, args.channels)
+        state.parse_guild_create(data)
+        if receives_messages:
+            for i in range(args.messages):
+                state.parse_message_create(message_payload(guild_id, text_ids[i % len(text_ids)], member_ids[i % len(member_ids)]))
+                messages += 1
+        # 실제 게이트웨이처럼 이벤트 사이에 루프를 양보
+        await asyncio.sleep(0)
+
+    await ready.wait()
+    ready_seconds = time.perf_counter() - started - READY_TIMEOUT
+
+    return {
+        'mode': 'lean' if main.LEAN_GATEWAY else 'default',
+        'intents': state._intents.value,
+        'guilds': len(state._guilds),
+        'cached_members': sum(len(guild._members) for guild in state._guilds.values()),
+        'cached_users': len(state._users),
+        'cached_messages': len(state._messages) if state._messages is not None else 0,
+        'messages_received': messages,
+        'import_seconds': round(import_seconds, 3),
+        'ready_seconds': round(ready_seconds, 3),
+        'rss_import_mb': round((after_import - baseline) / 1024, 1),
+        'rss_total_mb': round(rss_kb() / 1024, 1),
+        'rss_state_mb': round((rss_kb() - after_import) / 1024, 1)
+    }
+
+def run_mode(lean, args):
+    env = dict(os.environ)
+    env.pop('SHARD_COUNT', None)
+    env.pop('CHANNEL_POOL_ENABLED', None)
+    env['LEAN_GATEWAY'] = '1' if lean else ''
+    command = [sys.executable, os.path.abspath(__file__), '--child',
+               '--guilds', str(args.guilds), '--members', str(args.members),
+               '--channels', str(args.channels), '--messages', str(args.messages)]
+    output = subprocess.run(command, env=env, cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--guilds', type=int, default=500)
+    parser.add_argument('--members', type=int, default=100, help='길드당 GUILD_CREATE에 포함된 멤버 수')
+    parser.add_argument('--channels', type=int, default=10, help='길드당 텍스트/음성 채널 수 (각각)')
+    parser.add_argument('--messages', type=int, default=20, help='길드당 MESSAGE_CREATE 수 (메시지 인텐트가 있을 때만)')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, ROOT)
+        print(json.dumps(asyncio.run(feed(args))))
+        return
+
+    results = [run_mode(False, args), run_mode(True, args)]
+    keys = [key for key in results[0] if key != 'mode']
+    print(f"{args.guilds} guilds x {args.members} members x {args.channels * 2} channels, {args.messages} messages/guild")
+    print(f"{'':<20}{'default':>12}{'lean':>12}")
+    for key in keys:
+        print(f"{key:<20}{results[0][key]:>12}{results[1][key]:>12}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,583 @@
+"""오프라인 부하 테스트 - 가짜 게이트웨이/REST로 봇 핸들러를 직접 구동
+
+실제 Discord에 연결하지 않고 main.py의 VoiceChannelView.create_voice_channel,
+on_voice_state_update, 채널 삭제 타이머를 가짜 길드/멤버/채널 모델 위에서 실행.
+REST 호출은 지연 시간과 429 확률을 설정할 수 있는 가짜 레이어가 처리.
+
+    python benchmarks/loadtest.py --scenario all --guilds 5 --users 500
+    python benchmarks/loadtest.py --scenario click_storm --latency 0.1 --rate-429 0.02
+
+시나리오
+    click_storm      사용자들이 동시에 버튼을 누르고 (절반은 음성 채널에 있는 상태) 모두 나감
+    churn            생성된 채널에 멤버들이 무작위로 들어갔다 나가기를 반복
+    mass_disconnect  모든 채널이 가득 찬 상태에서 전원이 한꺼번에 연결 종료
+    spam             사용자마다 같은 버튼을 동시에 여러 번 클릭 (입장 제어/중복 제거 확인)
+    orphans          타이머 유실/몰래 삭제된 채널/주인 없는 채널을 만든 뒤 고아 채널 스윕으로 정리
+
+각 시나리오가 끝나면 타이머가 모두 만료될 때까지 기다린 뒤 남은 채널/타이머/
+레지스트리 항목을 누수로 보고.
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import logging
+import tempfile
+import itertools
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['CHANNEL_JOURNAL_PATH'] = os.path.join(tempfile.mkdtemp(prefix='voicebot-loadtest-'), 'journal.jsonl')
+os.environ.pop('CHANNEL_POOL_ENABLED', None)
+
+import discord
+import main
+
+_ids = itertools.count(10 ** 17)
+
+# ---------------------------------------------------------------------------
+# 가짜 REST 레이어
+# ---------------------------------------------------------------------------
+
+class FakeResponse:
+    """discord.HTTPException 생성에 필요한 최소한의 응답 객체"""
+
+    def __init__(self, status, reason):
+        self.status = status
+        self.reason = reason
+
+RETRY_AFTER = 0.05  # 가짜 429의 retry_after (초)
+discord_http_log = logging.getLogger('discord.http')
+
+class FakeREST:
+    """REST 호출마다 지연을 넣고 일정 확률로 429를 발생
+
+    discord.py처럼 429는 예외로 올리지 않고 'We are being rate limited' 경고를 남긴 뒤
+    retry_after만큼 기다렸다 다시 보냄.
+    """
+
+    def __init__(self, latency, jitter, rate_429):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.calls = {}
+        self.rate_limited = 0
+
+    async def call(self, route):
+        self.calls[route] = self.calls.get(route, 0) + 1
+        while True:
+            await asyncio.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+            if not (self.rate_429 and random.random() < self.rate_429):
+                return
+            self.rate_limited += 1
+            discord_http_log.warning('We are being rate limited. %s %s responded with 429. Retrying in %.2f seconds.',
+                                     'POST', f'/fake/{route}', RETRY_AFTER)
+            await asyncio.sleep(RETRY_AFTER)
+
+# ---------------------------------------------------------------------------
+# 가짜 게이트웨이 모델
+# ---------------------------------------------------------------------------
+
+class FakeGateway:
+    """게이트웨이 이벤트를 main의 핸들러로 전달하고 처리 시간을 기록"""
+
+    def __init__(self):
+        self.tasks = set()
+        self.voice_latencies = []
+
+    def dispatch(self, handler, *args):
+        task = asyncio.create_task(self._run(handler, *args))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _run(self, handler, *args):
+        started = time.perf_counter()
+        try:
+            await handler(*args)
+        finally:
+            if handler is main.on_voice_state_update:
+                self.voice_latencies.append(time.perf_counter() - started)
+
+    async def drain(self):
+        while self.tasks:
+            await asyncio.gather(*list(self.tasks), return_exceptions=True)
+
+class FakeRole:
+    def __init__(self, guild):
+        self.id = guild.id
+        self.name = '@everyone'
+
+class FakeVoiceState:
+    def __init__(self, channel):
+        self.channel = channel
+
+class FakeCategory:
+    def __init__(self, guild, name):
+        self.id = next(_ids)
+        self.guild = guild
+        self.name = name
+        self.overwrites = {}
+
+    @property
+    def voice_channels(self):
+        return [channel for channel in self.guild.channels.values()
+                if isinstance(channel, FakeVoiceChannel) and channel.category_id == self.id]
+
+class FakeVoiceChannel:
+    def __init__(self, guild, name, category, user_limit=0, overwrites=None):
+        self.id = next(_ids)
+        self.guild = guild
+        self.name = name
+        self.category = category
+        self.category_id = category.id if category else None
+        self.user_limit = user_limit
+        self.overwrites = dict(overwrites or {})
+        self.members = []
+        self.created_at = datetime.now(timezone.utc)
+
+    async def delete(self):
+        await self.guild.rest.call('delete_channel')
+        if self.id not in self.guild.channels:
+            raise discord.NotFound(FakeResponse(404, 'Not Found'), 'Unknown Channel')
+        del self.guild.channels[self.id]
+        # 채널에 남아 있던 멤버는 연결이 끊김
+        for member in list(self.members):
+            member.voice = None
+        self.members.clear()
+        self.guild.gateway.dispatch(main.on_guild_channel_delete, self)
+
+    async def edit(self, *, name=None, user_limit=None, overwrites=None):
+        await self.guild.rest.call('edit_channel')
+        if self.id not in self.guild.channels:
+            raise discord.NotFound(FakeResponse(404, 'Not Found'), 'Unknown Channel')
+        if name is not None:
+            self.name = name
+        if user_limit is not None:
+            self.user_limit = user_limit
+        if overwrites is not None:
+            self.overwrites = dict(overwrites)
+
+    async def set_permissions(self, target, **permissions):
+        await self.guild.rest.call('set_permissions')
+        self.overwrites[target] = discord.PermissionOverwrite(**permissions)
+
+class FakeMember:
+    def __init__(self, guild, index):
+        self.id = next(_ids)
+        self.guild = guild
+        self.display_name = f"user-{index}"
+        self.voice = None
+
+    async def move_to(self, channel):
+        await self.guild.rest.call('move_member')
+        self.guild.move(self, channel)
+
+class FakeGuild:
+    def __init__(self, index, rest, gateway):
+        self.id = next(_ids)
+        self.name = f"guild-{index}"
+        self.rest = rest
+        self.gateway = gateway
+        self.unavailable = False
+        self.channels = {}
+        self.default_role = FakeRole(self)
+        self.me = FakeRole(self)
+        self.lobby = self._add(FakeVoiceChannel(self, '로비', None))
+
+    def _add(self, channel):
+        self.channels[channel.id] = channel
+        return channel
+
+    @property
+    def categories(self):
+        return [channel for channel in self.channels.values() if isinstance(channel, FakeCategory)]
+
+    @property
+    def voice_channels(self):
+        return [channel for channel in self.channels.values() if isinstance(channel, FakeVoiceChannel)]
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    def get_member(self, member_id):
+        return None
+
+    async def create_category(self, name):
+        await self.rest.call('create_category')
+        category = self._add(FakeCategory(self, name))
+        self.gateway.dispatch(main.on_guild_channel_create, category)
+        return category
+
+    async def create_voice_channel(self, name, category=None, user_limit=0, overwrites=None):
+        await self.rest.call('create_channel')
+        channel = self._add(FakeVoiceChannel(self, name, category, user_limit, overwrites))
+        self.gateway.dispatch(main.on_guild_channel_create, channel)
+        return channel
+
+    def move(self, member, channel):
+        """멤버의 음성 상태를 바꾸고 게이트웨이처럼 on_voice_state_update 전달"""
+        before = FakeVoiceState(member.voice.channel if member.voice else None)
+        if before.channel is not None and member in before.channel.members:
+            before.channel.members.remove(member)
+        if channel is not None:
+            channel.members.append(member)
+            member.voice = FakeVoiceState(channel)
+        else:
+            member.voice = None
+        self.gateway.dispatch(main.on_voice_state_update, member, before, FakeVoiceState(channel))
+
+    def temp_channels(self):
+        return [channel for channel in self.voice_channels if channel.category is not None]
+
+class FakeInteractionResponse:
+    def __init__(self):
+        self.done = False
+        self.messages = []
+
+    def is_done(self):
+        return self.done
+
+    async def defer(self, **kwargs):
+        self.done = True
+
+    async def send_message(self, *args, embed=None, **kwargs):
+        self.done = True
+        self.messages.append(embed)
+
+class FakeFollowup:
+    def __init__(self):
+        self.messages = []
+
+    async def send(self, *args, embed=None, **kwargs):
+        self.messages.append(embed)
+
+class FakeInteraction:
+    def __init__(self, guild, user):
+        self.guild = guild
+        self.guild_id = guild.id
+        self.user = user
+        self.response = FakeInteractionResponse()
+        self.followup = FakeFollowup()
+
+    @property
+    def outcome(self):
+        """created / duplicate (연타 합침) / rejected (입장 제어 거절) / failed"""
+        if any(embed is not None and embed.title.startswith('🎉') for embed in self.followup.messages):
+            return 'created'
+        for embed in self.response.messages:
+            if embed is not None and embed.title.startswith('⏳'):
+                return 'duplicate'
+            if embed is not None and embed.title.startswith('🚫'):
+                return 'rejected'
+        return 'failed'
+
+CLICK_OUTCOMES = ('created', 'duplicate', 'rejected', 'failed')
+
+# ---------------------------------------------------------------------------
+# 시나리오
+# ---------------------------------------------------------------------------
+
+class LoadTest:
+    def __init__(self, args):
+        self.args = args
+        self.rest = FakeREST(args.latency, args.jitter, args.rate_429)
+        self.gateway = FakeGateway()
+        self.guilds = [FakeGuild(i, self.rest, self.gateway) for i in range(args.guilds)]
+        self.members = {guild.id: [FakeMember(guild, i) for i in range(args.users)] for guild in self.guilds}
+        self.guild_map = {guild.id: guild for guild in self.guilds}
+        self.outcomes = dict.fromkeys(CLICK_OUTCOMES, 0)
+        main.bot.get_guild = self.guild_map.get
+        main.bot.get_user = lambda user_id: None
+        main.bot._connection._guilds = self.guild_map
+        self.notes = []
+
+    async def settle(self):
+        """이벤트 처리, 삭제 타이머, REST 대기열이 모두 끝날 때까지 대기
+
+        고정 시간이 아니라 진행이 멈춘 채로 stall초가 지났을 때만 포기하므로,
+        실제 속도(--rest-rate-scale 1)로 천천히 비워지는 대기열을 누수로 세지 않음.
+        """
+        stall = 60 * self.args.time_scale + 5
+        last_progress = time.monotonic()
+        last_state = None
+        while True:
+            await self.gateway.drain()
+            state = (len(main.expiry_timers), main.channel_settler.pending(),
+                     main.rest_scheduler.pending, main.rest_scheduler.executed)
+            if not any(state[:3]) and not self.gateway.tasks:
+                break
+            now = time.monotonic()
+            if state != last_state:
+                last_state, last_progress = state, now
+            elif now - last_progress > stall:
+                break
+            await asyncio.sleep(max(0.01, self.args.time_scale))
+        await self.gateway.drain()
+
+    def leaks(self):
+        channels = sum(len(guild.temp_channels()) for guild in self.guilds)
+        return {
+            'channels': channels,
+            'timers': len(main.expiry_timers) + main.channel_settler.pending(),
+            'registry': len(main.channel_registry)
+        }
+
+    async def click(self, view, guild, member, limit):
+        interaction = FakeInteraction(guild, member)
+        started = time.perf_counter()
+        await view.create_voice_channel(interaction, limit)
+        outcome = interaction.outcome
+        self.outcomes[outcome] += 1
+        return time.perf_counter() - started, outcome
+
+    async def click_storm(self):
+        view = main.VoiceChannelView()
+        # 절반은 로비 음성 채널에 있는 상태에서 클릭
+        for members in self.members.values():
+            for member in members[::2]:
+                member.guild.move(member, member.guild.lobby)
+        await self.gateway.drain()
+        self.gateway.voice_latencies.clear()
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(
+            self.click(view, guild, member, random.randint(1, 5))
+            for guild in self.guilds for member in self.members[guild.id]
+        ))
+        elapsed = time.perf_counter() - started
+
+        # 모두 나가서 채널이 정리되는지 확인
+        for members in self.members.values():
+            for member in members:
+                if member.voice:
+                    member.guild.move(member, None)
+        await self.settle()
+
+        # 지연은 실제로 채널을 받은 클릭만 (거절은 REST 없이 바로 끝나 분포를 왜곡함)
+        latencies = [latency for latency, outcome in results if outcome == 'created']
+        return len(results), elapsed, latencies
+
+    async def churn(self):
+        view = main.VoiceChannelView()
+        for guild in self.guilds:
+            for member in self.members[guild.id][:self.args.users // 4]:
+                await self.click(view, guild, member, 5)
+        await self.gateway.drain()
+        self.gateway.voice_latencies.clear()
+
+        events = 0
+        started = time.perf_counter()
+        for _ in range(self.args.rounds):
+            for guild in self.guilds:
+                channels = guild.temp_channels()
+                for member in random.sample(self.members[guild.id], min(len(self.members[guild.id]), 50)):
+                    target = random.choice(channels + [None]) if channels else None
+                    if target is not None and target.id not in guild.channels:
+                        continue
+                    guild.move(member, target)
+                    events += 1
+            await asyncio.sleep(0)
+        await self.gateway.drain()
+        elapsed = time.perf_counter() - started
+
+        for members in self.members.values():
+            for member in members:
+                if member.voice:
+                    member.guild.move(member, None)
+        await self.settle()
+        return events, elapsed, list(self.gateway.voice_latencies)
+
+    async def mass_disconnect(self):
+        view = main.VoiceChannelView()
+        for guild in self.guilds:
+            members = self.members[guild.id]
+            for member in members:
+                guild.move(member, guild.lobby)
+            await self.gateway.drain()
+            # 5명씩 채널을 만들어 가득 채움
+            for i in range(0, len(members), 5):
+                await self.click(view, guild, members[i], 5)
+                await self.gateway.drain()
+                channel = members[i].voice.channel if members[i].voice else None
+                if channel is not None:
+                    for member in members[i + 1:i + 5]:
+                        guild.move(member, channel)
+        await self.gateway.drain()
+        self.gateway.voice_latencies.clear()
+
+        started = time.perf_counter()
+        events = 0
+        for members in self.members.values():
+            for member in members:
+                if member.voice:
+                    member.guild.move(member, None)
+                    events += 1
+        await self.gateway.drain()
+        elapsed = time.perf_counter() - started
+        await self.settle()
+        return events, elapsed, list(self.gateway.voice_latencies)
+
+    async def spam(self):
+        view = main.VoiceChannelView()
+        for members in self.members.values():
+            for member in members:
+                member.guild.move(member, member.guild.lobby)
+        await self.gateway.drain()
+
+        clicks = [(guild, member, random.randint(1, 5)) for guild in self.guilds for member in self.members[guild.id]]
+        started = time.perf_counter()
+        results = await asyncio.gather(*(
+            self.click(view, guild, member, limit)
+            for guild, member, limit in clicks for _ in range(self.args.spam_clicks)
+        ))
+        elapsed = time.perf_counter() - started
+        created = sum(len(guild.temp_channels()) for guild in self.guilds)
+        self.notes.append(f"클릭 {len(results)}회 → 채널 {created}개 생성 (사용자 {len(clicks)}명)")
+
+        for members in self.members.values():
+            for member in members:
+                if member.voice:
+                    member.guild.move(member, None)
+        await self.settle()
+
+        # 지연은 실제로 채널을 받은 클릭만 (거절은 REST 없이 바로 끝나 분포를 왜곡함)
+        latencies = [latency for latency, outcome in results if outcome == 'created']
+        return len(results), elapsed, latencies
+
+    async def orphans(self):
+        view = main.VoiceChannelView()
+        for guild in self.guilds:
+            for member in self.members[guild.id][:self.args.users // 4]:
+                await self.click(view, guild, member, 3)
+        await self.gateway.drain()
+
+        # 채널 셋 중 하나는 타이머 유실, 하나는 봇 모르게 삭제, 나머지는 정상 만료
+        events = 0
+        for guild in self.guilds:
+            for i, channel in enumerate(guild.temp_channels()):
+                if i % 3 == 0:
+                    main.expiry_timers.cancel(channel.id)
+                elif i % 3 == 1:
+                    main.expiry_timers.cancel(channel.id)
+                    del guild.channels[channel.id]
+                else:
+                    continue
+                events += 1
+            # 재시작 전에 남은 것처럼 레지스트리에 없는 채널
+            category = guild.get_channel(main.channel_slots.categories[guild.id])
+            for i in range(self.args.users // 10):
+                guild._add(FakeVoiceChannel(guild, f"3인방 #{1000 + i}", category))
+                events += 1
+
+        await asyncio.sleep(main.ORPHAN_SWEEP_GRACE * 1.5)
+        started = time.perf_counter()
+        latencies = []
+        # 끊긴 레코드는 두 번 연속 확인돼야 제거됨
+        for _ in range(2):
+            sweep_started = time.perf_counter()
+            result = await main.orphan_sweeper.sweep()
+            self.notes.append(f"스윕: 주인 없는 채널 {result['orphans']}개 ({result['deleted']}개 삭제), "
+                              f"끊긴 레코드 {result['stale']}개, 타이머 유실 {result['stuck']}개, {result['elapsed_ms']}ms")
+            latencies.append(time.perf_counter() - sweep_started)
+        elapsed = time.perf_counter() - started
+        await self.settle()
+        return events, elapsed, latencies
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+def report(name, events, elapsed, latencies, outcomes, leaks, rest):
+    print(f"\n[{name}]")
+    print(f"  이벤트 {events}개 / {elapsed:.2f}s  →  {events / elapsed if elapsed else 0:.0f} events/s")
+    print(f"  지연 p50 {percentile(latencies, 0.5) * 1000:.1f}ms  "
+          f"p99 {percentile(latencies, 0.99) * 1000:.1f}ms  "
+          f"max {max(latencies, default=0) * 1000:.1f}ms")
+    if any(outcomes.values()):
+        print(f"  클릭 결과: 생성 {outcomes['created']}회, 중복 합침 {outcomes['duplicate']}회, "
+              f"거절 {outcomes['rejected']}회, 실패 {outcomes['failed']}회")
+    print(f"  REST 호출 {sum(rest.calls.values())}회 {dict(sorted(rest.calls.items()))}, "
+          f"429 {rest.rate_limited}회 (봇 집계 누적 {main.rest_scheduler.rate_limited}회)")
+    print(f"  settle로 합쳐진 퇴장 이벤트 (누적) {main.channel_settler.coalesced}개")
+    print(f"  상태 스냅샷 갱신 (누적) {main.status_snapshot.publishes}회")
+    admission = {outcome: count for outcome, count in main.admission_control.stats().items() if count}
+    print(f"  입장 제어 (누적) {admission}")
+    overview = main.analytics.overview()
+    totals = overview['totals']
+    peak_channels = max((row['peak_channels'] for row in overview['guilds'].values()), default=0)
+    print(f"  사용 통계 (누적, {len(overview['guilds'])}개 길드) 생성 {totals['created']}개, 삭제 {totals['deleted']}개, "
+          f"미사용 삭제 {totals['unused']}개, 길드 최대 동시 채널 {peak_channels}개, 현재 인원 {totals['current_occupants']}명")
+    print(f"  누수: 채널 {leaks['channels']}개, 타이머 {leaks['timers']}개, 레지스트리 {leaks['registry']}개")
+
+def install(args):
+    """main의 타이머/스케줄러를 부하 테스트 배율에 맞춤 (한 번만 호출)"""
+    # 30초/5초 타이머를 time_scale 배로 줄여 빠르게 진행
+    wheel = main.expiry_timers
+    wheel.resolution = max(0.001, args.time_scale)
+    original_arm = wheel.arm
+    wheel.arm = lambda key, delay, callback: original_arm(key, delay * args.time_scale, callback)
+    main.channel_settler.window *= args.time_scale
+    main.ORPHAN_SWEEP_GRACE *= args.time_scale
+    main.ORPHAN_SWEEP_PAUSE *= args.time_scale
+    main.CLICK_DEDUP_WINDOW *= args.time_scale
+
+    # 가짜 REST는 실제 Discord보다 훨씬 빠르므로 토큰 버킷도 같은 배율로 늘림
+    scale = args.rest_rate_scale
+    main.GUILD_LIMIT = (main.GUILD_LIMIT[0] * scale, main.GUILD_LIMIT[1] * scale)
+    main.ROUTE_LIMITS = {route: (rate * scale, burst * scale, scope)
+                         for route, (rate, burst, scope) in main.ROUTE_LIMITS.items()}
+
+    main.expiry_timers.start()
+
+async def run(args):
+    install(args)
+    if args.rest_rate_scale != 1:
+        print(f"⚠️  --rest-rate-scale {args.rest_rate_scale:g}: REST 토큰 버킷이 운영보다 {args.rest_rate_scale:g}배 빠름 - "
+              f"지연/처리량 수치는 실제보다 낙관적입니다.")
+    scenarios = ['click_storm', 'churn', 'mass_disconnect', 'spam', 'orphans'] if args.scenario == 'all' else [args.scenario]
+    leaked = False
+
+    for name in scenarios:
+        test = LoadTest(args)
+        events, elapsed, latencies = await getattr(test, name)()
+        leaks = test.leaks()
+        report(name, events, elapsed, latencies, test.outcomes, leaks, test.rest)
+        for note in test.notes:
+            print(f"  {note}")
+        leaked = leaked or any(leaks.values())
+
+        # 다음 시나리오를 위해 남은 상태 초기화
+        for channel_id in list(main.channel_registry.records):
+            main.untrack_channel(channel_id)
+
+    return 1 if leaked and args.fail_on_leak else 0
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenario', default='all', choices=['all', 'click_storm', 'churn', 'mass_disconnect', 'spam', 'orphans'])
+    parser.add_argument('--guilds', type=int, default=5)
+    parser.add_argument('--users', type=int, default=200, help='길드당 사용자 수')
+    parser.add_argument('--rounds', type=int, default=20, help='churn 시나리오 반복 횟수')
+    parser.add_argument('--spam-clicks', type=int, default=5, help='spam 시나리오에서 사용자당 동시 클릭 수')
+    parser.add_argument('--latency', type=float, default=0.02, help='가짜 REST 평균 지연(초)')
+    parser.add_argument('--jitter', type=float, default=0.01, help='가짜 REST 지연 편차(초)')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='REST 호출이 429로 실패할 확률')
+    parser.add_argument('--time-scale', type=float, default=0.01, help='삭제 타이머 시간 배율')
+    parser.add_argument('--rest-rate-scale', type=float, default=1.0,
+                        help='토큰 버킷 속도 배율 (1 = 운영과 같은 REST 속도, 1보다 크면 처리량 문제가 가려짐)')
+    parser.add_argument('--fail-on-leak', action='store_true', help='누수가 있으면 종료 코드 1')
+    parser.add_argument('--log', action='store_true', help='봇 로그 출력')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    if not args.log:
+        # 출력만 끄고 discord.http 경고는 로거 필터(429 집계)까지 전달되게 둠
+        logging.getLogger('main').setLevel(logging.ERROR)
+        for handler in logging.getLogger().handlers:
+            handler.setLevel(logging.CRITICAL + 1)
+    sys.exit(asyncio.run(run(args)))
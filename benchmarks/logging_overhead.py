@@ -0,0 +1,127 @@
+"""로깅이 이벤트 핸들러 지연에 더하는 비용 측정
+
+음성 상태 핸들러 한 번을 흉내 낸 작업(딕셔너리 조회 + 로그 한 줄)을 --burst개씩 몰아서
+실행하고, 묶음 사이에는 이벤트 루프가 I/O를 기다리는 것처럼 --idle초 쉬면서
+핸들러 한 번에 걸린 시간을 비교.
+
+    before   logging.basicConfig 방식 - f-string을 호출 시점에 만들고 같은 스레드에서 바로 출력
+    after    main.py 파이프라인 - %-포맷 인자와 extra 필드를 큐에 넣고 별도 스레드에서 JSON 출력
+    sampled  after + 고빈도 이벤트 샘플링 (LOG_SAMPLE_RATE개/초)
+
+    python benchmarks/logging_overhead.py --calls 50000 --burst 200 --idle 0.002 --sink file
+"""
+import os
+import sys
+import time
+import queue
+import logging
+import logging.handlers
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# main import 전의 기본 레코드 수집 설정 (before 모드에서 복원)
+DEFAULT_RECORD_OPTIONS = (logging._srcfile, logging.logThreads, logging.logProcesses, logging.logMultiprocessing)
+
+from main import JsonFormatter, LazyQueueHandler, LogSampler, LOG_SAMPLE_RATE
+
+def open_sink(kind):
+    if kind == 'devnull':
+        return open(os.devnull, 'w')
+    if kind == 'stderr':
+        return sys.stderr
+    return tempfile.NamedTemporaryFile('w', prefix='voicebot-log-', suffix='.log', delete=True)
+
+def build_before(stream):
+    logger = logging.getLogger('bench.before')
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    logger.handlers[:] = [handler]
+    return logger, None
+
+def build_after(stream, sampled):
+    logger = logging.getLogger('bench.sampled' if sampled else 'bench.after')
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JsonFormatter())
+    log_queue = queue.SimpleQueue()
+    queue_handler = LazyQueueHandler(log_queue)
+    if sampled:
+        queue_handler.addFilter(LogSampler(LOG_SAMPLE_RATE))
+    logger.handlers[:] = [queue_handler]
+    listener = logging.handlers.QueueListener(log_queue, handler)
+    listener.start()
+    return logger, listener
+
+def set_record_options(options):
+    logging._srcfile, logging.logThreads, logging.logProcesses, logging.logMultiprocessing = options
+
+def run(mode, args, stream):
+    if mode == 'before':
+        set_record_options(DEFAULT_RECORD_OPTIONS)
+        logger, listener = build_before(stream)
+    else:
+        set_record_options((None, False, False, False))
+        logger, listener = build_after(stream, sampled=mode == 'sampled')
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+    channels = {i: {'name': f"3인방 #{i}", 'members': i % 4} for i in range(1000)}
+    timings = []
+    started = time.perf_counter()
+    for i in range(args.calls):
+        if i and i % args.burst == 0:
+            time.sleep(args.idle)
+        handler_started = time.perf_counter_ns()
+        channel = channels[i % 1000]
+        if mode == 'before':
+            logger.info(f"⏹️ 채널 입장으로 타이머 취소됨: {channel['name']}")
+        else:
+            logger.info("⏹️ 채널 입장으로 타이머 취소됨: %s", channel['name'], extra={
+                'event': 'timer_cancel', 'guild': 1, 'channel': i % 1000, 'user': i
+            })
+        timings.append(time.perf_counter_ns() - handler_started)
+    elapsed = time.perf_counter() - started - (args.calls // args.burst) * args.idle
+
+    # 출력 스레드가 큐를 비울 때까지 걸린 시간은 따로 표시
+    drain_started = time.perf_counter()
+    if listener is not None:
+        listener.stop()
+    drained = time.perf_counter() - drain_started
+
+    timings.sort()
+    return {
+        'mean_us': sum(timings) / len(timings) / 1000,
+        'p50_us': timings[len(timings) // 2] / 1000,
+        'p99_us': timings[int(len(timings) * 0.99)] / 1000,
+        'max_us': timings[-1] / 1000,
+        'total_s': elapsed,
+        'drain_s': drained
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=50000)
+    parser.add_argument('--burst', type=int, default=200, help='쉬지 않고 연달아 처리하는 이벤트 수')
+    parser.add_argument('--idle', type=float, default=0.002, help='묶음 사이 대기 시간(초)')
+    parser.add_argument('--sink', default='file', choices=['file', 'devnull', 'stderr'])
+    args = parser.parse_args()
+
+    # main import 시 설정된 루트 로거 출력은 측정에서 제외
+    logging.getLogger().handlers.clear()
+
+    results = {}
+    for mode in ('before', 'after', 'sampled'):
+        stream = open_sink(args.sink)
+        results[mode] = run(mode, args, stream)
+        if stream is not sys.stderr:
+            stream.close()
+
+    print(f"{args.calls} log calls in bursts of {args.burst} (idle {args.idle * 1000:.0f}ms), sink={args.sink}")
+    print(f"{'':<10}{'mean':>10}{'p50':>10}{'p99':>10}{'max':>12}{'busy':>10}{'drain':>10}")
+    for mode, result in results.items():
+        print(f"{mode:<10}{result['mean_us']:>8.2f}us{result['p50_us']:>8.2f}us{result['p99_us']:>8.2f}us"
+              f"{result['max_us']:>10.1f}us{result['total_s']:>9.2f}s{result['drain_s']:>9.2f}s")
+
+if __name__ == "__main__":
+    main()
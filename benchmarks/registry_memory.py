@@ -0,0 +1,76 @@
+"""채널 레지스트리 메모리/조회 비용 측정
+
+기존 dict 기반 created_channels 항목과 ChannelRecord 기반 레지스트리를
+같은 수의 채널로 채운 뒤 채널당 메모리와 사용자별 조회 시간을 비교.
+
+    python benchmarks/registry_memory.py [채널 수]
+"""
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import ChannelRecord, ChannelRegistry
+
+USERS = 500
+
+class FakeChannel:
+    __slots__ = ('id',)
+
+    def __init__(self, channel_id):
+        self.id = channel_id
+
+def build_legacy(count, channels):
+    created_channels = {}
+    for i in range(count):
+        created_channels[i] = {
+            'channel': channels[i],
+            'creator': i % USERS,
+            'created_at': datetime.now(),
+            'limit': i % 5 + 1,
+            'has_been_used': False,
+            'auto_created': False
+        }
+    return created_channels
+
+def build_registry(count, channels):
+    registry = ChannelRegistry()
+    for i in range(count):
+        registry.add(ChannelRecord(channels[i].id, 1, i % USERS, i % 5 + 1))
+    return registry
+
+def measure(builder, count, channels):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = builder(count, channels)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    return result, size / count
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    channels = [FakeChannel(i) for i in range(count)]  # 채널 객체는 게이트웨이 캐시에 원래 있음
+
+    legacy, legacy_bytes = measure(build_legacy, count, channels)
+    registry, registry_bytes = measure(build_registry, count, channels)
+
+    started = time.perf_counter()
+    for user_id in range(USERS):
+        [info for info in legacy.values() if info['creator'] == user_id and not info.get('auto_created')]
+    legacy_query = (time.perf_counter() - started) / USERS
+
+    started = time.perf_counter()
+    for user_id in range(USERS):
+        registry.for_creator(user_id)
+    registry_query = (time.perf_counter() - started) / USERS
+
+    print(f"채널 {count}개, 사용자 {USERS}명")
+    print(f"dict 기반     : 채널당 {legacy_bytes:.0f} bytes, 사용자 조회 {legacy_query * 1e6:.1f}us")
+    print(f"레지스트리    : 채널당 {registry_bytes:.0f} bytes, 사용자 조회 {registry_query * 1e6:.1f}us")
+
+if __name__ == "__main__":
+    main()
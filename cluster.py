@@ -0,0 +1,176 @@
+import os
+import sys
+import asyncio
+import logging
+from datetime import datetime
+
+import aiohttp
+from aiohttp import web
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("cluster")
+
+# 클러스터 설정
+WORKERS = int(os.environ.get('CLUSTER_WORKERS', 2))
+SHARD_COUNT = int(os.environ.get('SHARD_COUNT', WORKERS))
+PUBLIC_PORT = int(os.environ.get('PORT', 10000))
+WORKER_BASE_PORT = int(os.environ.get('CLUSTER_WORKER_BASE_PORT', PUBLIC_PORT + 1))
+RESTART_BACKOFF_MAX = 60
+
+def shard_groups(shard_count, workers):
+    """샤드 ID를 워커 수만큼 연속된 묶음으로 나눔"""
+    groups = [[] for _ in range(workers)]
+    for shard_id in range(shard_count):
+        groups[shard_id * workers // shard_count].append(shard_id)
+    return [group for group in groups if group]
+
+class Worker:
+    """샤드 묶음 하나를 담당하는 main.py 프로세스"""
+
+    def __init__(self, cluster_id, shard_ids):
+        self.cluster_id = cluster_id
+        self.shard_ids = shard_ids
+        self.port = WORKER_BASE_PORT + cluster_id
+        self.process = None
+        self.restarts = 0
+        self.started_at = None
+        self.stopping = False  # supervisor가 직접 종료를 요청했는지
+
+    def env(self):
+        env = dict(os.environ)
+        env.update({
+            'CLUSTER_ID': str(self.cluster_id),
+            'SHARD_COUNT': str(SHARD_COUNT),
+            'SHARD_IDS': ','.join(map(str, self.shard_ids)),
+            'PORT': str(self.port),
+            'CLUSTER_SUPERVISOR_URL': f"http://127.0.0.1:{PUBLIC_PORT}"
+        })
+        return env
+
+    async def supervise(self):
+        """supervisor가 요청하지 않은 종료는 종료 코드와 상관없이 장애로 보고 이 워커만 다시 시작"""
+        backoff = 1
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+
+        while True:
+            self.process = await asyncio.create_subprocess_exec(sys.executable, script, env=self.env())
+            self.started_at = datetime.now()
+            logger.info(f"🚀 워커 {self.cluster_id} 시작 (샤드 {self.shard_ids}, pid {self.process.pid})")
+
+            code = await self.process.wait()
+            if self.stopping:
+                logger.info(f"🛑 워커 {self.cluster_id} 정상 종료 (코드 {code})")
+                return
+
+            # 오래 버틴 워커는 백오프 초기화
+            if (datetime.now() - self.started_at).total_seconds() > RESTART_BACKOFF_MAX:
+                backoff = 1
+            self.restarts += 1
+            logger.error(f"🚨 워커 {self.cluster_id} 비정상 종료 (코드 {code}), {backoff}초 후 재시작")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, RESTART_BACKOFF_MAX)
+
+    def stop(self):
+        self.stopping = True
+        if self.process and self.process.returncode is None:
+            self.process.terminate()
+
+class Supervisor:
+    """워커 프로세스를 관리하고 /health, /cluster를 로컬 IPC로 집계"""
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.session = None
+
+    async def fetch_worker(self, worker):
+        try:
+            async with self.session.get(f"http://127.0.0.1:{worker.port}/health") as response:
+                status = await response.json()
+        except Exception:
+            status = None
+        return worker, status
+
+    async def collect(self):
+        results = await asyncio.gather(*(self.fetch_worker(worker) for worker in self.workers))
+        alive = [status for _, status in results if status]
+        return {
+            'workers': len(self.workers),
+            'alive_workers': len(alive),
+            'ready_workers': sum(1 for status in alive if status.get('ready')),
+            'shard_count': SHARD_COUNT,
+            'guilds': sum(status.get('guilds', 0) for status in alive),
+            'active_channels': sum(status.get('active_channels', 0) for status in alive),
+            'pending_timers': sum(status.get('timers', {}).get('pending', 0) for status in alive),
+            'restarts': sum(worker.restarts for worker in self.workers),
+            'members': [
+                {
+                    'cluster_id': worker.cluster_id,
+                    'shard_ids': worker.shard_ids,
+                    'pid': worker.process.pid if worker.process else None,
+                    'restarts': worker.restarts,
+                    'status': status
+                }
+                for worker, status in results
+            ]
+        }
+
+    async def health(self, request):
+        summary = await self.collect()
+        summary.pop('members')
+        summary.update({
+            'status': 'alive',
+            'timestamp': datetime.now().isoformat(),
+            'bot_ready': summary['ready_workers'] == summary['workers']
+        })
+        return web.json_response(summary)
+
+    async def cluster(self, request):
+        return web.json_response(await self.collect())
+
+    async def livez(self, request):
+        return web.json_response({'status': 'alive'})
+
+    async def readyz(self, request):
+        """모든 워커가 클릭을 처리할 수 있을 때만 200"""
+        summary = await self.collect()
+        ready = summary['ready_workers'] == summary['workers']
+        body = {'ready': ready, 'workers': summary['workers'], 'ready_workers': summary['ready_workers']}
+        return web.json_response(body, status=200 if ready else 503)
+
+    async def ping(self, request):
+        return web.json_response({'pong': True, 'timestamp': datetime.now().isoformat()})
+
+    async def run(self):
+        self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=2))
+
+        app = web.Application()
+        app.router.add_get('/', self.health)
+        app.router.add_get('/health', self.health)
+        app.router.add_get('/cluster', self.cluster)
+        app.router.add_get('/ping', self.ping)
+        app.router.add_get('/livez', self.livez)
+        app.router.add_get('/readyz', self.readyz)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, '0.0.0.0', PUBLIC_PORT).start()
+        logger.info(f"🌐 클러스터 웹 서버 시작됨 (포트 {PUBLIC_PORT})")
+
+        try:
+            await asyncio.gather(*(worker.supervise() for worker in self.workers))
+        finally:
+            for worker in self.workers:
+                worker.stop()
+            await self.session.close()
+            await runner.cleanup()
+
+if __name__ == "__main__":
+    if not os.getenv('DISCORD_BOT_TOKEN'):
+        logger.error("❌ DISCORD_BOT_TOKEN 환경변수가 설정되지 않았습니다!")
+    else:
+        groups = shard_groups(SHARD_COUNT, WORKERS)
+        logger.info(f"🧩 {len(groups)}개 워커로 {SHARD_COUNT}개 샤드 실행")
+        try:
+            asyncio.run(Supervisor([Worker(i, group) for i, group in enumerate(groups)]).run())
+        except KeyboardInterrupt:
+            pass
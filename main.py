@@ -1,18 +1,185 @@
-from flask import Flask
-from threading import Thread
+import time
+STARTUP_STARTED = time.perf_counter()  # 시작 프로파일 기준 시각 - 다른 import보다 먼저
+
 import os
-import requests
+import sys
+import aiohttp
+from aiohttp import web
 import asyncio
 from datetime import datetime
 import logging
 import random
+import re
+import heapq
+import math
+import json
+import bisect
+import hashlib
+import hmac
+import functools
+import queue
+import atexit
+import logging.handlers
+import contextlib
+from collections import deque
+
+try:
+    import fcntl
+except ImportError:  # Windows - 웜 스탠바이 미지원
+    fcntl = None
+
+# 로깅 설정 - 이벤트 루프 스레드는 레코드를 큐에 넣기만 하고 포맷/출력은 별도 스레드에서 처리
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')               # json 또는 text
+LOG_SAMPLE_RATE = int(os.environ.get('LOG_SAMPLE_RATE', 5))     # 샘플링 대상 이벤트의 초당 최대 기록 수
+LOG_FIELDS = ('event', 'guild', 'channel', 'user', 'latency_ms')
+LOG_SAMPLED_EVENTS = frozenset(('timer_arm', 'timer_cancel', 'voice_join', 'dispose_dropped'))
+
+class JsonFormatter(logging.Formatter):
+    """한 줄에 JSON 레코드 하나 - extra로 넘긴 guild/channel/user/latency_ms 필드 포함"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        for field in LOG_FIELDS + ('sampled_dropped',):
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class LogSampler(logging.Filter):
+    """고빈도 이벤트를 이벤트별 초당 rate개로 제한 - 버린 수는 다음 기록에 sampled_dropped로 붙임"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+        self.windows = {}   # event -> [초, 이번 초에 기록한 수]
+        self.dropped = {}   # event -> 마지막 기록 이후 버린 수
+
+    def filter(self, record):
+        event = getattr(record, 'event', None)
+        if event not in LOG_SAMPLED_EVENTS:
+            return True
+        second = int(record.created)
+        window = self.windows.get(event)
+        if window is None or window[0] != second:
+            window = self.windows[event] = [second, 0]
+        if window[1] >= self.rate:
+            self.dropped[event] = self.dropped.get(event, 0) + 1
+            return False
+        window[1] += 1
+        if event in self.dropped:
+            record.sampled_dropped = self.dropped.pop(event)
+        return True
 
-# 로깅 설정
-logging.basicConfig(level=logging.INFO)
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """메시지 포맷을 출력 스레드로 미룸 (기본 QueueHandler는 넣기 전에 포맷함)"""
+
+    def prepare(self, record):
+        if record.exc_info:
+            # traceback만 호출 스레드에서 문자열로 만들어 둠
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def configure_logging():
+    # 출력에 쓰지 않는 호출 위치/스레드/프로세스 정보는 레코드를 만들 때 수집하지 않음
+    logging._srcfile = None
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter() if LOG_FORMAT == 'json' else logging.Formatter(logging.BASIC_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = LazyQueueHandler(log_queue)
+    queue_handler.addFilter(LogSampler(LOG_SAMPLE_RATE))
+
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.handlers[:] = [queue_handler]
+
+    listener = logging.handlers.QueueListener(log_queue, handler)
+    listener.start()
+    # 종료 시 큐에 남은 기록까지 출력
+    atexit.register(listener.stop)
+    return listener
+
+log_listener = configure_logging()
 logger = logging.getLogger(__name__)
 
-# 웹 서버 (Render용) - 더 안정적으로 개선
-app = Flask(__name__)
+def interpreter_boot_seconds():
+    """프로세스 생성부터 이 모듈 실행까지 걸린 시간 (리눅스에서만, 실패하면 None)"""
+    try:
+        with open('/proc/self/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        process_started = int(fields[19]) / os.sysconf('SC_CLK_TCK')
+        return max(0.0, time.clock_gettime(time.CLOCK_BOOTTIME) - process_started - (time.perf_counter() - STARTUP_STARTED))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+class StartupProfiler:
+    """시작 단계별 소요 시간과 주요 시점(모듈 시작 기준)을 기록하고 한 번에 요약"""
+
+    def __init__(self, started):
+        self.started = started
+        self.boot = interpreter_boot_seconds()
+        self.phases = {}       # 이름 -> (시작 시점, 길이)
+        self.milestones = {}   # 이름 -> 시점
+        self.reported = False
+
+    def now(self):
+        return time.perf_counter() - self.started
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        started = self.now()
+        try:
+            yield
+        finally:
+            duration = self.now() - started
+            self.phases[name] = (started, duration)
+            logger.info(f"⏱️ 시작 단계 {name}: {duration * 1000:.1f}ms (+{started:.3f}s)")
+
+    def mark(self, name):
+        if name not in self.milestones:
+            self.milestones[name] = self.now()
+
+    def report(self):
+        return {
+            'interpreter_boot_s': round(self.boot, 3) if self.boot is not None else None,
+            'milestones_s': {name: round(at, 3) for name, at in self.milestones.items()},
+            'phases_ms': {name: round(duration * 1000, 1) for name, (_, duration) in self.phases.items()}
+        }
+
+    def summarize(self):
+        """상태가 일관해진 첫 시점에 한 줄 요약"""
+        if self.reported:
+            return
+        self.reported = True
+        milestones = self.milestones
+        logger.info(
+            f"🚀 시작 완료: import {milestones.get('imported', 0):.2f}s, "
+            f"게이트웨이 준비 {milestones.get('gateway_ready', 0):.2f}s, "
+            f"상태 일관 {milestones.get('consistent', 0):.2f}s"
+            + (f" (인터프리터 기동 {self.boot:.2f}s 별도)" if self.boot is not None else "")
+        )
+
+startup = StartupProfiler(STARTUP_STARTED)
+
+# 클러스터 모드 설정 (cluster.py가 워커 프로세스마다 지정)
+CLUSTER_ID = os.environ.get('CLUSTER_ID')
+CLUSTER_SUPERVISOR_URL = os.environ.get('CLUSTER_SUPERVISOR_URL')
+SHARD_COUNT = int(os.environ['SHARD_COUNT']) if os.environ.get('SHARD_COUNT') else None
+SHARD_IDS = [int(i) for i in os.environ['SHARD_IDS'].split(',')] if os.environ.get('SHARD_IDS') else None
+
+# 웹 서버 (Render용) - 봇 이벤트 루프 안에서 aiohttp로 실행
 
 # 봇 상태 추적용 전역 변수
 bot_status = {
@@ -20,101 +187,403 @@ bot_status = {
     'total_pings': 0,
     'bot_ready': False,
     'last_auto_channel': datetime.now(),
-    'auto_channels_created': 0
+    'auto_channels_created': 0,
+    'keep_alive_ok': None,
+    'latency_ms': None,
+    'last_heartbeat': None,
+    'loop_lag_ms': 0.0,
+    'max_loop_lag_ms': 0.0,
+    'role': 'leader'
 }
 
-@app.route('/')
-def home():
+def service_ready():
+    """버튼 클릭을 바로 처리할 수 있는 상태 - 게이트웨이 연결 + 채널 상태 복구 완료 + 리더"""
+    return (bot_status['bot_ready'] and channel_journal.restored
+            and bot_status['role'] == 'leader' and not bot.is_closed())
+
+def build_health():
+    return {
+        "status": "alive", 
+        "timestamp": datetime.now().isoformat(),
+        "bot_ready": bot_status['bot_ready'],
+        "ready": service_ready(),
+        "startup": startup.report(),
+        "active_channels": len(channel_registry),
+        "auto_channels_created": bot_status['auto_channels_created'],
+        "timers": expiry_timers.stats(),
+        "services": lifecycle.stats(),
+        "orphan_sweep": orphan_sweeper.stats(),
+        "admission": admission_control.stats(),
+        "channel_list": channel_list_cache.stats(),
+        "guild_config": guild_config.stats(),
+        "role": bot_status['role'],
+        "lease": lease.stats() if lease is not None else None,
+        "keep_alive_ok": bot_status['keep_alive_ok'],
+        "gateway_latency_ms": bot_status['latency_ms'],
+        "loop_lag_ms": bot_status['loop_lag_ms'],
+        "max_loop_lag_ms": bot_status['max_loop_lag_ms'],
+        "rest": rest_scheduler.stats(),
+        "click_latency_ms": click_latency.percentiles(),
+        "cluster_id": CLUSTER_ID,
+        "shard_ids": SHARD_IDS,
+        "guilds": len(bot.guilds)
+    }
+
+def render_home():
     status = "🟢 온라인" if bot_status['bot_ready'] else "🟡 시작중"
     return f"""
     <h1>Discord Bot Status</h1>
     <p>상태: {status}</p>
     <p>마지막 핑: {bot_status['last_ping'].strftime('%Y-%m-%d %H:%M:%S')}</p>
     <p>총 핑 횟수: {bot_status['total_pings']}</p>
-    <p>활성 채널: {len(created_channels) if 'created_channels' in globals() else 0}개</p>
+    <p>활성 채널: {len(channel_registry)}개</p>
     <p>자동 채널 생성: {bot_status['auto_channels_created']}개</p>
     <p>마지막 자동 채널: {bot_status['last_auto_channel'].strftime('%Y-%m-%d %H:%M:%S')}</p>
     """
 
-@app.route('/health')
-def health():
-    return {
-        "status": "alive", 
-        "timestamp": datetime.now().isoformat(),
-        "bot_ready": bot_status['bot_ready'],
-        "active_channels": len(created_channels) if 'created_channels' in globals() else 0,
-        "auto_channels_created": bot_status['auto_channels_created']
+STATUS_PUBLISH_INTERVAL = float(os.environ.get('STATUS_PUBLISH_INTERVAL', 1.0))  # 스냅샷 최소 갱신 간격 (초)
+
+class StatusSnapshot:
+    """웹 응답용 상태 스냅샷 - 상태가 바뀌면 루프에서 다시 만들고 요청은 읽기만 함
+
+    build_health() + json.dumps는 수십~수백 µs라 변경마다 만들지 않고
+    STATUS_PUBLISH_INTERVAL에 최대 한 번으로 묶음 (조용하던 뒤 첫 변경은 바로 반영).
+    """
+
+    def __init__(self, interval=STATUS_PUBLISH_INTERVAL):
+        self.health_body = b'{"status": "alive", "bot_ready": false}'
+        self.home_html = "<h1>Discord Bot Status</h1><p>상태: 🟡 시작중</p>"
+        self.interval = interval
+        self.published_at = float('-inf')
+        self.publishes = 0
+        self._scheduled = False
+
+    def invalidate(self):
+        """상태 변경 알림 - 간격 안의 여러 변경은 한 번의 publish로 합침"""
+        if self._scheduled:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._scheduled = True
+        delay = self.published_at + self.interval - time.monotonic()
+        if delay > 0:
+            loop.call_later(delay, self.publish)
+        else:
+            loop.call_soon(self.publish)
+
+    def publish(self):
+        self._scheduled = False
+        self.published_at = time.monotonic()
+        self.publishes += 1
+        try:
+            # bytes/str는 불변이라 참조 교체만으로 일관된 스냅샷이 됨
+            self.health_body = json.dumps(build_health(), ensure_ascii=False).encode('utf-8')
+            self.home_html = render_home()
+        except Exception as e:
+            logger.error(f"❌ 상태 스냅샷 생성 오류: {e}")
+
+status_snapshot = StatusSnapshot()
+
+async def handle_home(request):
+    return web.Response(text=status_snapshot.home_html, content_type='text/html')
+
+async def handle_health(request):
+    return web.Response(body=status_snapshot.health_body, content_type='application/json')
+
+async def handle_livez(request):
+    """프로세스와 이벤트 루프가 살아 있으면 200 - 실패하면 재시작 대상"""
+    return web.json_response({"status": "alive", "uptime_s": round(startup.now(), 1)})
+
+async def handle_readyz(request):
+    """클릭을 처리할 수 있을 때만 200 - 시작 중/재연결 중/스탠바이는 503"""
+    ready = service_ready()
+    body = {
+        "ready": ready,
+        "gateway": bot_status['bot_ready'],
+        "restored": channel_journal.restored,
+        "role": bot_status['role']
     }
+    return web.json_response(body, status=200 if ready else 503)
 
-@app.route('/ping')
-def ping():
+async def handle_ping(request):
     bot_status['last_ping'] = datetime.now()
     bot_status['total_pings'] += 1
-    return {"pong": True, "timestamp": datetime.now().isoformat()}
+    status_snapshot.invalidate()
+    return web.json_response({"pong": True, "timestamp": datetime.now().isoformat()})
 
-def run_web():
-    app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 10000)), debug=False)
+async def handle_metrics(request):
+    # 길드별 레이블(guild ID)이 있어 /analytics와 같은 접근 제한
+    if not analytics_authorized(request):
+        raise web.HTTPForbidden(text="metrics requires ANALYTICS_TOKEN")
+    return web.Response(text=metrics.render(), content_type='text/plain', charset='utf-8')
+
+def analytics_authorized(request):
+    """ANALYTICS_TOKEN이 있으면 Bearer 토큰, 없으면 같은 호스트에서 온 요청만 허용"""
+    if ANALYTICS_TOKEN:
+        return hmac.compare_digest(request.headers.get('Authorization', '').encode(), f"Bearer {ANALYTICS_TOKEN}".encode())
+    return request.remote in ('127.0.0.1', '::1')
+
+async def handle_analytics(request):
+    """사용 통계 JSON - ?guild=ID로 길드 하나의 시계열 (?hours=N, 기본 24시간), 없으면 길드별 합계"""
+    if not analytics_authorized(request):
+        raise web.HTTPForbidden(text="analytics requires ANALYTICS_TOKEN")
+    if 'guild' not in request.query:
+        return web.json_response(analytics.overview())
+    try:
+        guild_id = int(request.query['guild'])
+        hours = max(1, int(request.query.get('hours', 24)))
+    except ValueError:
+        raise web.HTTPBadRequest(text="guild and hours must be integers")
+    snapshot = analytics.snapshot(guild_id, hours)
+    if snapshot is None:
+        raise web.HTTPNotFound(text="no analytics for this guild")
+    return web.json_response(snapshot)
+
+async def start_web():
+    """봇과 같은 이벤트 루프에서 웹 서버 시작"""
+    app = web.Application()
+    app.router.add_get('/', handle_home)
+    app.router.add_get('/health', handle_health)
+    app.router.add_get('/ping', handle_ping)
+    app.router.add_get('/livez', handle_livez)
+    app.router.add_get('/readyz', handle_readyz)
+    app.router.add_get('/metrics', handle_metrics)
+    app.router.add_get('/analytics', handle_analytics)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    # 클러스터 워커는 supervisor만 접근하도록 로컬에만 바인딩
+    host = '127.0.0.1' if CLUSTER_ID is not None else '0.0.0.0'
+    await web.TCPSite(runner, host, int(os.environ.get('PORT', 10000))).start()
+    status_snapshot.publish()
+    logger.info("🌐 웹 서버 시작됨")
+    return runner
+
+# Prometheus 형식 지표 - 고정 버킷이라 이벤트마다 객체를 만들지 않음
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # 마지막 칸은 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """버킷 경계로 근사한 분위수 (샘플이 없으면 None)"""
+        if not self.count:
+            return None
+        target = q * self.count
+        cumulative = 0
+        for i, bucket in enumerate(self.counts):
+            cumulative += bucket
+            if cumulative >= target:
+                return self.bounds[min(i, len(self.bounds) - 1)]
+        return self.bounds[-1]
+
+class Counter:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+class MetricsRegistry:
+    """지표 보관소 - 지표 객체는 한 번 만들고 호출부가 참조를 들고 사용"""
+
+    def __init__(self):
+        self.families = {}  # name -> (type, help, {labels: metric})
+        self.gauges = {}    # name -> (help, 수집 함수)
+
+    def _get(self, kind, name, help_text, labels, factory):
+        family = self.families.setdefault(name, (kind, help_text, {}))[2]
+        key = tuple(sorted(labels.items()))
+        metric = family.get(key)
+        if metric is None:
+            metric = family[key] = factory()
+        return metric
+
+    def histogram(self, name, help_text, labels=None, bounds=LATENCY_BUCKETS):
+        return self._get('histogram', name, help_text, labels or {}, lambda: Histogram(bounds))
+
+    def counter(self, name, help_text, labels=None):
+        return self._get('counter', name, help_text, labels or {}, Counter)
+
+    def gauge(self, name, help_text, collect):
+        """collect()는 (labels, value) 목록을 반환 - 스크레이프 시점에만 호출"""
+        self.gauges[name] = (help_text, collect)
+
+    @staticmethod
+    def _labels(key, extra=None):
+        items = list(key) + ([extra] if extra else [])
+        if not items:
+            return ''
+        return '{' + ','.join(f'{k}="{v}"' for k, v in items) + '}'
+
+    def render(self):
+        lines = []
+        for name, (kind, help_text, family) in self.families.items():
+            # 카운터는 샘플 이름(_total)과 HELP/TYPE 이름이 같아야 파서가 같은 계열로 묶음
+            family_name = f"{name}_total" if kind == 'counter' else name
+            lines.append(f"# HELP {family_name} {help_text}")
+            lines.append(f"# TYPE {family_name} {kind}")
+            for key, metric in family.items():
+                if kind == 'counter':
+                    lines.append(f"{family_name}{self._labels(key)} {metric.value}")
+                    continue
+                cumulative = 0
+                for bound, bucket in zip(metric.bounds + (float('inf'),), metric.counts):
+                    cumulative += bucket
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f"{name}_bucket{self._labels(key, ('le', le))} {cumulative}")
+                lines.append(f"{name}_sum{self._labels(key)} {metric.sum}")
+                lines.append(f"{name}_count{self._labels(key)} {metric.count}")
+        for name, (help_text, collect) in self.gauges.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in collect():
+                lines.append(f"{name}{self._labels(tuple(sorted(labels.items())))} {value}")
+        return '\n'.join(lines) + '\n'
+
+metrics = MetricsRegistry()
+
+def observe_duration(histogram):
+    """코루틴 실행 시간을 히스토그램에 기록하는 데코레이터"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+loop_lag_histogram = metrics.histogram(
+    'voicebot_event_loop_lag_seconds', '이벤트 루프 지연', bounds=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+)
+keep_alive_counters = {
+    outcome: metrics.counter('voicebot_keep_alive', 'Keep-alive self-ping 결과', {'outcome': outcome})
+    for outcome in ('ok', 'bad_status', 'error')
+}
+
+# 봇 활성 상태 감시 (self-ping, 게이트웨이 heartbeat, 이벤트 루프 지연)
+KEEP_ALIVE_INTERVAL = 180  # 3분마다 ping (5분보다 짧게)
+LOOP_LAG_INTERVAL = 1.0
+LOOP_LAG_WARN = 0.5  # 이 이상 루프가 막히면 경고
+
+class LivenessMonitor:
+    """keep-alive를 비동기로 처리하고 봇 활성 상태를 REST 호출 없이 추적"""
+
+    def __init__(self):
+        self.session = None
+        self.consecutive_failures = 0
+
+    async def self_ping_loop(self):
+        max_failures = 3
+        # 커넥션을 재사용하는 세션 하나로 ping (서비스 재시작 시에도 재사용)
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10))
+
+        while True:
+            await asyncio.sleep(KEEP_ALIVE_INTERVAL)
 
-# 개선된 Keep-Alive 함수
-async def keep_alive():
-    """더 안정적인 keep-alive 시스템"""
-    consecutive_failures = 0
-    max_failures = 3
-    
-    while True:
-        try:
-            # 3분마다 ping (5분보다 짧게)
-            await asyncio.sleep(180)  # 180초 = 3분
-            
             # 환경변수에서 URL 가져오기
             url = os.environ.get('RENDER_EXTERNAL_URL')
-            
-            if url:
-                # 자신의 서버에 ping
-                response = requests.get(f"{url}/ping", timeout=30)
-                
-                if response.status_code == 200:
-                    consecutive_failures = 0
-                    logger.info(f"✅ Keep-alive 성공: {response.status_code} at {datetime.now()}")
-                else:
-                    consecutive_failures += 1
-                    logger.warning(f"⚠️ Keep-alive 응답 이상: {response.status_code}")
-            else:
+            if not url:
                 logger.info("🔄 RENDER_EXTERNAL_URL 미설정, 로컬 모드")
-                
-        except requests.exceptions.RequestException as e:
-            consecutive_failures += 1
-            logger.error(f"❌ Keep-alive 네트워크 오류: {e}")
-            
-        except Exception as e:
-            consecutive_failures += 1
-            logger.error(f"❌ Keep-alive 예상치 못한 오류: {e}")
-        
-        # 연속 실패가 많으면 더 자주 시도
-        if consecutive_failures >= max_failures:
-            logger.error(f"🚨 Keep-alive {consecutive_failures}회 연속 실패, 1분 후 재시도")
-            await asyncio.sleep(60)  # 1분 후 재시도
-        
-        # 상태 업데이트
-        bot_status['last_ping'] = datetime.now()
+                continue
+
+            try:
+                async with self.session.get(f"{url}/ping") as response:
+                    if response.status == 200:
+                        self.consecutive_failures = 0
+                        bot_status['keep_alive_ok'] = True
+                        keep_alive_counters['ok'].inc()
+                        logger.info("✅ Keep-alive 성공: %s", response.status, extra={'event': 'keep_alive'})
+                    else:
+                        self.consecutive_failures += 1
+                        bot_status['keep_alive_ok'] = False
+                        keep_alive_counters['bad_status'].inc()
+                        logger.warning("⚠️ Keep-alive 응답 이상: %s", response.status, extra={'event': 'keep_alive'})
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.consecutive_failures += 1
+                bot_status['keep_alive_ok'] = False
+                keep_alive_counters['error'].inc()
+                logger.error("❌ Keep-alive 네트워크 오류: %s", e, extra={'event': 'keep_alive'})
+            except Exception as e:
+                self.consecutive_failures += 1
+                bot_status['keep_alive_ok'] = False
+                keep_alive_counters['error'].inc()
+                logger.error("❌ Keep-alive 예상치 못한 오류: %s", e, extra={'event': 'keep_alive'})
+
+            # 연속 실패가 많으면 더 자주 시도
+            if self.consecutive_failures >= max_failures:
+                logger.error(f"🚨 Keep-alive {self.consecutive_failures}회 연속 실패, 1분 후 재시도")
+                await asyncio.sleep(60)  # 1분 후 재시도
+
+    async def loop_lag_loop(self):
+        """sleep이 예정보다 늦게 깨어난 만큼을 루프 지연으로 기록"""
+        while True:
+            expected = time.monotonic() + LOOP_LAG_INTERVAL
+            await asyncio.sleep(LOOP_LAG_INTERVAL)
+            lag = max(0.0, time.monotonic() - expected)
+            loop_lag_histogram.observe(lag)
+
+            bot_status['loop_lag_ms'] = round(lag * 1000, 1)
+            bot_status['max_loop_lag_ms'] = max(bot_status['max_loop_lag_ms'], bot_status['loop_lag_ms'])
+            if lag >= LOOP_LAG_WARN:
+                logger.warning("🐢 이벤트 루프가 %.0fms 동안 막혔습니다.", lag * 1000,
+                               extra={'event': 'loop_lag', 'latency_ms': round(lag * 1000, 1)})
+
+            # 게이트웨이 heartbeat 응답으로 봇 활성 상태 판단
+            latency = bot.latency
+            if latency == latency and latency != float('inf'):  # 연결 전에는 nan/inf
+                bot_status['latency_ms'] = round(latency * 1000, 1)
+                bot_status['last_heartbeat'] = datetime.now()
+
+            # 타이머/REST 통계 등 계속 변하는 값도 스냅샷에 반영
+            status_snapshot.invalidate()
+
+liveness = LivenessMonitor()
+
+# 자동 채널 생성으로 봇 활성 상태 유지 (REST 호출이 많아 기본 비활성)
+AUTO_CHANNEL_KEEPER = os.environ.get('AUTO_CHANNEL_KEEPER', '').lower() in ('1', 'true', 'yes')
 
-# 자동 채널 생성으로 봇 활성 상태 유지
 async def auto_channel_keeper():
-    """10분마다 자동으로 임시 채널을 생성해서 봇을 깨워둠"""
+    """길드 설정 주기(기본 10분)마다 자동으로 임시 채널을 생성해서 봇을 깨워둠"""
     await bot.wait_until_ready()
+    last_created = {}  # guild_id -> 마지막 자동 채널 생성 시각
     
     while not bot.is_closed():
         try:
-            # 10분 대기 (600초)
-            await asyncio.sleep(600)
+            # 가장 짧은 길드 주기만큼 대기 (기본 600초)
+            interval = min((guild_config.get(guild.id).keeper_interval for guild in bot.guilds),
+                           default=guild_config.defaults.keeper_interval)
+            await asyncio.sleep(interval)
             
-            # 모든 길드를 확인
+            # 주기가 지난 길드를 확인
+            now = time.monotonic()
             for guild in bot.guilds:
+                settings = guild_config.get(guild.id)
+                last = last_created.get(guild.id)
+                if last is not None and now - last < settings.keeper_interval - 1:
+                    continue
                 try:
                     # 카테고리 찾기 또는 생성
-                    category = discord.utils.get(guild.categories, name="🔊 임시 통화방")
-                    if not category:
-                        category = await guild.create_category("🔊 임시 통화방")
+                    category = await channel_slots.resolve_category(guild)
                     
                     # 랜덤한 이름으로 채널 생성
                     random_names = [
@@ -125,30 +594,34 @@ async def auto_channel_keeper():
                     channel_name = f"{random.choice(random_names)}-{random.randint(100, 999)}"
                     
                     # 음성 채널 생성
-                    voice_channel = await guild.create_voice_channel(
-                        name=channel_name,
-                        category=category,
-                        user_limit=1  # 1명만 들어갈 수 있게 (실제 사용 방지)
+                    voice_channel = await rest_scheduler.submit(
+                        'create_channel', guild.id, PRIORITY_KEEPER,
+                        lambda: guild.create_voice_channel(
+                            name=channel_name,
+                            category=category,
+                            user_limit=1  # 1명만 들어갈 수 있게 (실제 사용 방지)
+                        )
                     )
                     
                     # 생성된 채널 추적
-                    created_channels[voice_channel.id] = {
-                        'channel': voice_channel,
-                        'creator': bot.user.id,  # 봇이 생성
-                        'created_at': datetime.now(),
-                        'limit': 1,
-                        'has_been_used': False,
-                        'auto_created': True  # 자동 생성 표시
-                    }
+                    track_channel(ChannelRecord(
+                        voice_channel.id, guild.id,
+                        bot.user.id,  # 봇이 생성
+                        1,
+                        auto_created=True  # 자동 생성 표시
+                    ))
                     
-                    # 5초 후 자동 삭제 (빠른 정리)
-                    asyncio.create_task(delete_auto_channel(voice_channel.id, 5))
+                    # 설정 시간(기본 5초) 후 자동 삭제 (빠른 정리)
+                    expiry_timers.arm(voice_channel.id, settings.keeper_ttl, expire_auto_channel)
+                    last_created[guild.id] = now
                     
                     # 상태 업데이트
                     bot_status['last_auto_channel'] = datetime.now()
                     bot_status['auto_channels_created'] += 1
+                    status_snapshot.invalidate()
                     
-                    logger.info(f"🤖 자동 Keep-Alive 채널 생성됨: {channel_name} in {guild.name}")
+                    logger.info("🤖 자동 Keep-Alive 채널 생성됨: %s in %s", channel_name, guild.name,
+                                extra={'event': 'auto_channel_create', 'guild': guild.id, 'channel': voice_channel.id})
                     
                     # 길드당 하나만 생성
                     break
@@ -160,175 +633,2234 @@ async def auto_channel_keeper():
         except Exception as e:
             logger.error(f"❌ 자동 채널 생성 시스템 오류: {e}")
 
-async def delete_auto_channel(channel_id, delay=5):
-    """자동 생성된 채널을 빠르게 삭제"""
-    try:
-        await asyncio.sleep(delay)
-        
-        if channel_id in created_channels and created_channels[channel_id].get('auto_created'):
-            channel = created_channels[channel_id]['channel']
-            
-            try:
-                await channel.delete()
-                logger.info(f"🗑️ 자동 생성 채널 삭제됨: {channel.name}")
-            except discord.NotFound:
-                pass  # 이미 삭제됨
-            
-            # 딕셔너리에서 제거
-            if channel_id in created_channels:
-                del created_channels[channel_id]
-                
-    except Exception as e:
-        logger.error(f"❌ 자동 채널 삭제 오류: {e}")
+async def expire_auto_channel(channel_id):
+    """자동 생성된 채널을 빠르게 삭제"""
+    try:
+        record = channel_registry.get(channel_id)
+        if record and record.auto_created:
+            channel = channel_registry.channel(record)
+            
+            try:
+                if channel is not None:
+                    await rest_scheduler.submit('delete_channel', channel.guild.id, PRIORITY_KEEPER, channel.delete,
+                                                channel_id=channel.id)
+                    logger.info("🗑️ 자동 생성 채널 삭제됨: %s", channel.name,
+                                extra={'event': 'auto_channel_delete', 'guild': channel.guild.id, 'channel': channel.id})
+            except discord.NotFound:
+                pass  # 이미 삭제됨
+            
+            # 딕셔너리에서 제거
+            untrack_channel(channel_id)
+                
+    except Exception as e:
+        logger.error(f"❌ 자동 채널 삭제 오류: {e}")
+
+# Discord 봇 부분
+import discord
+from discord import app_commands
+from discord.ext import commands, tasks
+from datetime import timedelta
+
+# 경량 게이트웨이 모드 - 음성 상태/채널 이벤트만 받고 메시지·멤버 캐시를 끔 (슬래시 명령어 전용)
+LEAN_GATEWAY = os.environ.get('LEAN_GATEWAY', '').lower() in ('1', 'true', 'yes')
+
+# 봇 설정
+if LEAN_GATEWAY:
+    intents = discord.Intents.none()
+    intents.voice_states = True
+    intents.guilds = True
+    
+    # 음성 채널에 있는 멤버만 캐시 (channel.members 계산에 필요)
+    member_cache_flags = discord.MemberCacheFlags.none()
+    member_cache_flags.voice = True
+    bot_options = {
+        'member_cache_flags': member_cache_flags,
+        'max_messages': None,
+        'chunk_guilds_at_startup': False,
+        'help_command': None
+    }
+else:
+    intents = discord.Intents.default()
+    intents.message_content = True
+    intents.voice_states = True
+    intents.guilds = True
+    bot_options = {}
+
+if SHARD_COUNT:
+    # 샤딩 모드 - 이 프로세스는 SHARD_IDS에 해당하는 샤드만 담당
+    bot = commands.AutoShardedBot(
+        command_prefix='!', intents=intents, shard_count=SHARD_COUNT, shard_ids=SHARD_IDS, **bot_options
+    )
+else:
+    bot = commands.Bot(command_prefix='!', intents=intents, **bot_options)
+
+# 생성된 채널들을 추적하는 레지스트리
+class ChannelRecord:
+    """추적 중인 임시 채널 하나 - 채널 객체 대신 ID만 보관"""
+    __slots__ = ('channel_id', 'guild_id', 'creator', 'limit', 'created_at', 'has_been_used', 'auto_created')
+
+    def __init__(self, channel_id, guild_id, creator, limit, created_at=None,
+                 has_been_used=False, auto_created=False):
+        self.channel_id = channel_id
+        self.guild_id = guild_id
+        self.creator = creator
+        self.limit = limit
+        self.created_at = created_at if created_at is not None else time.time()
+        self.has_been_used = has_been_used
+        self.auto_created = auto_created
+
+class ChannelRegistry:
+    """임시 채널 레지스트리 - 생성자/길드별 보조 인덱스와 종류별 O(1) 카운터"""
+
+    def __init__(self):
+        self.records = {}     # channel_id -> ChannelRecord
+        self.by_creator = {}  # user_id -> {channel_id}
+        self.by_guild = {}    # guild_id -> {channel_id}
+        self.user_count = 0
+        self.auto_count = 0
+        self.user_count_by_guild = {}  # guild_id -> 사용자 채널 수
+
+    def __contains__(self, channel_id):
+        return channel_id in self.records
+
+    def __len__(self):
+        return len(self.records)
+
+    def get(self, channel_id):
+        return self.records.get(channel_id)
+
+    def add(self, record):
+        self.remove(record.channel_id)
+        self.records[record.channel_id] = record
+        self.by_creator.setdefault(record.creator, set()).add(record.channel_id)
+        self.by_guild.setdefault(record.guild_id, set()).add(record.channel_id)
+        if record.auto_created:
+            self.auto_count += 1
+        else:
+            self.user_count += 1
+            self.user_count_by_guild[record.guild_id] = self.user_count_by_guild.get(record.guild_id, 0) + 1
+
+    def remove(self, channel_id):
+        record = self.records.pop(channel_id, None)
+        if record is None:
+            return None
+        for index, key in ((self.by_creator, record.creator), (self.by_guild, record.guild_id)):
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(channel_id)
+                if not ids:
+                    del index[key]
+        if record.auto_created:
+            self.auto_count -= 1
+        else:
+            self.user_count -= 1
+            remaining = self.user_count_by_guild[record.guild_id] - 1
+            if remaining:
+                self.user_count_by_guild[record.guild_id] = remaining
+            else:
+                del self.user_count_by_guild[record.guild_id]
+        return record
+
+    def for_creator(self, user_id, auto_created=False):
+        """특정 사용자가 만든 채널 - O(k)"""
+        records = (self.records[channel_id] for channel_id in self.by_creator.get(user_id, ()))
+        return [record for record in records if record.auto_created == auto_created]
+
+    def for_guild(self, guild_id, auto_created=False):
+        """특정 길드의 채널 - O(k)"""
+        records = (self.records[channel_id] for channel_id in self.by_guild.get(guild_id, ()))
+        return [record for record in records if record.auto_created == auto_created]
+
+    def channel(self, record):
+        """게이트웨이 캐시에서 채널 객체 조회 (REST 없음, O(1))"""
+        guild = bot.get_guild(record.guild_id)
+        return guild.get_channel(record.channel_id) if guild else None
+
+channel_registry = ChannelRegistry()
+
+# /채널목록 렌더링 캐시 - 임베드 필드 25개 제한 안에서 페이지로 나눔
+CHANNEL_LIST_PAGE_SIZE = 12
+
+class ChannelListCache:
+    """길드별 /채널목록 필드를 미리 렌더링해 두고 바뀐 채널만 다시 렌더링
+
+    필드는 채널 생성/삭제/입장/퇴장/이름 변경 때 그 채널 하나만 갱신하고,
+    페이지 임베드는 길드 버전이 바뀐 뒤 첫 조회 때만 필드를 이어 붙여 만듦.
+    """
+
+    def __init__(self, page_size=CHANNEL_LIST_PAGE_SIZE):
+        self.page_size = page_size
+        self.fields = {}     # guild_id -> {channel_id: (name, value)} (생성 순서)
+        self.versions = {}   # guild_id -> 필드가 바뀔 때마다 증가
+        self.pages = {}      # guild_id -> (version, [Embed])
+        # 통계
+        self.renders = 0
+        self.builds = 0
+        self.hits = 0
+
+    def update(self, record, channel=None):
+        """채널 하나의 필드를 다시 렌더링"""
+        if record is None or record.auto_created:
+            return
+        channel = channel or channel_registry.channel(record)
+        if channel is None:
+            # 생성 직후 게이트웨이 캐시에 아직 없음 - on_guild_channel_create에서 다시 갱신
+            return
+
+        creator = channel.guild.get_member(record.creator) or bot.get_user(record.creator)
+        member_count = len(channel.members)
+        status = "✅ 사용 중" if member_count else "⏰ 비어 있음 (곧 삭제)"
+        self.fields.setdefault(record.guild_id, {})[record.channel_id] = (
+            f"🔊 {channel.name}",
+            f"생성자: {creator.display_name if creator else '알 수 없음'}\n"
+            f"현재: {member_count}/{record.limit}명\n"
+            f"생성: {datetime.fromtimestamp(record.created_at).strftime('%H:%M:%S')}\n"
+            f"상태: {status}"
+        )
+        self.renders += 1
+        self._bump(record.guild_id)
+
+    def discard(self, guild_id, channel_id):
+        fields = self.fields.get(guild_id)
+        if fields is None or fields.pop(channel_id, None) is None:
+            return
+        if not fields:
+            del self.fields[guild_id]
+        self._bump(guild_id)
+
+    def _bump(self, guild_id):
+        self.versions[guild_id] = self.versions.get(guild_id, 0) + 1
+
+    def get_pages(self, guild_id):
+        """버전이 그대로면 이전에 만든 페이지를 그대로 반환"""
+        version = self.versions.get(guild_id, 0)
+        cached = self.pages.get(guild_id)
+        if cached is not None and cached[0] == version:
+            self.hits += 1
+            return cached[1]
+
+        pages = self._build(list(self.fields.get(guild_id, {}).values()))
+        self.pages[guild_id] = (version, pages)
+        self.builds += 1
+        return pages
+
+    def _build(self, fields):
+        if not fields:
+            return [discord.Embed(
+                title="📋 채널 목록",
+                description="현재 생성된 임시 통화방이 없습니다.",
+                color=0x888888
+            )]
+
+        chunks = [fields[i:i + self.page_size] for i in range(0, len(fields), self.page_size)]
+        pages = []
+        for number, chunk in enumerate(chunks, 1):
+            embed = discord.Embed(title="📋 현재 임시 통화방 목록", color=0x00ff99)
+            for name, value in chunk:
+                embed.add_field(name=name, value=value, inline=True)
+            embed.set_footer(text=f"페이지 {number}/{len(chunks)} · 통화방 {len(fields)}개")
+            pages.append(embed)
+        return pages
+
+    def stats(self):
+        return {'guilds': len(self.fields), 'renders': self.renders, 'builds': self.builds, 'hits': self.hits}
+
+channel_list_cache = ChannelListCache()
+
+
+# REST 변경 요청 스케줄러 - 우선순위: 사용자 클릭 > 이동 > 정리 > keeper
+PRIORITY_CLICK = 0
+PRIORITY_MOVE = 1
+PRIORITY_CLEANUP = 2
+PRIORITY_KEEPER = 3
+PRIORITY_NAMES = ('click', 'move', 'cleanup', 'keeper')
+
+# route -> (초당 토큰, 버스트, 범위) - Discord처럼 길드 또는 채널마다 따로 버킷을 둠
+ROUTE_LIMITS = {
+    'create_category': (1.0, 2, 'guild'),
+    'create_channel': (2.0, 5, 'guild'),
+    'edit_channel': (2.0, 5, 'channel'),
+    'set_permissions': (4.0, 5, 'channel'),
+    'move_member': (5.0, 10, 'guild'),
+    'delete_channel': (2.0, 5, 'channel')
+}
+GUILD_LIMIT = (5.0, 10)
+REST_WORKERS = 4
+BUCKET_PRUNE_INTERVAL = 60.0  # 다 찬(쉬고 있는) 버킷을 정리하는 주기 (초)
+
+class OperationDropped(Exception):
+    """대기 중이던 REST 작업이 더 이상 필요 없어져 취소됨"""
+
+class TokenBucket:
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def wait_time(self):
+        """토큰 하나를 쓸 수 있을 때까지 남은 시간 (0이면 바로 사용)"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self):
+        self.tokens -= 1
+
+    def idle(self):
+        """버킷이 다시 가득 찼으면 True - 지워도 새로 만든 버킷과 같음"""
+        self.wait_time()
+        return self.tokens >= self.capacity
+
+class RestJob:
+    __slots__ = ('priority', 'route', 'guild_id', 'channel_id', 'factory', 'key', 'future', 'queued_at')
+
+    def __init__(self, priority, route, guild_id, factory, key, channel_id=None):
+        self.priority = priority
+        self.route = route
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.factory = factory
+        self.key = key
+        self.future = asyncio.get_running_loop().create_future()
+        self.queued_at = time.monotonic()
+
+class RestScheduler:
+    """채널 변경 REST 호출을 우선순위 큐와 길드/채널별 토큰 버킷으로 조절
+
+    토큰이 없는 작업은 워커가 붙잡고 기다리지 않고 delayed 힙으로 옮겨 두므로,
+    한 길드의 정리 작업이 밀려 있어도 다른 작업(특히 클릭)은 바로 실행됨.
+    """
+
+    def __init__(self, workers=REST_WORKERS):
+        self.workers = workers
+        self.queue = []     # (priority, seq, job) min-heap
+        self.delayed = []   # (ready_at, priority, seq, job) - 토큰이 생길 때까지 쉬는 작업
+        self.keyed = {}     # coalesce key -> 대기 중인 job
+        self.pending = 0    # 아직 실행 전인 작업 수 (토큰 대기 포함, 취소 제외) - 큐를 훑지 않고 O(1)로 보고
+        self.route_buckets = {}  # (route, 길드/채널 ID) -> TokenBucket
+        self.guild_buckets = {}
+        self._pruned_at = time.monotonic()
+        self._seq = 0
+        self._wakeup = None
+        self._tasks = []
+        # 지표
+        self.executed = 0
+        self.dropped = 0
+        self.rate_limited = 0
+        self.wait_total = [0.0] * len(PRIORITY_NAMES)
+        self.wait_max = [0.0] * len(PRIORITY_NAMES)
+        self.wait_count = [0] * len(PRIORITY_NAMES)
+        self.route_latency = {
+            route: metrics.histogram('voicebot_rest_latency_seconds', 'Discord REST 호출 지연', {'route': route})
+            for route in ROUTE_LIMITS
+        }
+        self.rate_limited_counter = metrics.counter('voicebot_rest_rate_limited', 'REST 429 응답')
+
+    def _start(self):
+        if not self._tasks:
+            self._wakeup = asyncio.Event()
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def submit(self, route, guild_id, priority, factory, key=None, channel_id=None):
+        """factory()가 만든 코루틴을 순서가 오면 실행하고 결과 반환
+
+        같은 key의 작업이 이미 대기 중이면 새로 넣지 않고 그 결과를 함께 기다림.
+        채널 범위 route(삭제/수정)는 channel_id로 버킷을 나눔.
+        """
+        self._start()
+        if key is not None and key in self.keyed:
+            return await asyncio.shield(self.keyed[key].future)
+
+        job = RestJob(priority, route, guild_id, factory, key, channel_id)
+        if key is not None:
+            self.keyed[key] = job
+        self._seq += 1
+        heapq.heappush(self.queue, (priority, self._seq, job))
+        self.pending += 1
+        self._wakeup.set()
+        return await asyncio.shield(job.future)
+
+    def upgrade(self, key, priority, factory=None):
+        """대기 중인 작업을 더 강한 요청에 맞춤 - 우선순위를 올리고 factory를 교체
+
+        이미 실행을 시작했거나 없으면 False. 이전 힙 항목은 그대로 두고 꺼낼 때 건너뜀.
+        """
+        job = self.keyed.get(key)
+        if job is None or job.future.done():
+            return False
+        if factory is not None:
+            job.factory = factory
+        if priority < job.priority:
+            job.priority = priority
+            self._seq += 1
+            heapq.heappush(self.queue, (priority, self._seq, job))
+            self._wakeup.set()
+        return True
+
+    def drop(self, key):
+        """아직 실행되지 않은 작업 취소 (예: 삭제 대기 중 멤버 재입장)"""
+        job = self.keyed.pop(key, None)
+        if job is None or job.future.done():
+            return False
+        job.future.set_exception(OperationDropped(key))
+        self.pending -= 1
+        self.dropped += 1
+        return True
+
+    def _bucket(self, job):
+        limit = ROUTE_LIMITS.get(job.route)
+        if limit is None:
+            return None
+        rate, burst, scope = limit
+        key = (job.route, job.channel_id if scope == 'channel' and job.channel_id is not None else job.guild_id)
+        bucket = self.route_buckets.get(key)
+        if bucket is None:
+            bucket = self.route_buckets[key] = TokenBucket(rate, burst)
+        return bucket
+
+    def _reserve(self, job):
+        """route/길드 버킷 모두 토큰이 있으면 쓰고 0, 없으면 기다려야 할 시간"""
+        route_bucket = self._bucket(job)
+        guild_bucket = self.guild_buckets.get(job.guild_id)
+        if guild_bucket is None:
+            guild_bucket = self.guild_buckets[job.guild_id] = TokenBucket(*GUILD_LIMIT)
+        delay = max(guild_bucket.wait_time(), route_bucket.wait_time() if route_bucket else 0.0)
+        if delay <= 0:
+            guild_bucket.consume()
+            if route_bucket:
+                route_bucket.consume()
+        return delay
+
+    def _prune(self, now):
+        """쉬고 있는 버킷 정리 - 채널별 버킷이 채널 수만큼 쌓이지 않게 함"""
+        self._pruned_at = now
+        for buckets in (self.route_buckets, self.guild_buckets):
+            for key in [key for key, bucket in buckets.items() if bucket.idle()]:
+                del buckets[key]
+
+    async def _next_job(self):
+        """토큰을 확보한 다음 작업 - 토큰이 없는 작업은 delayed로 미루고 다음 작업을 봄"""
+        while True:
+            now = time.monotonic()
+            while self.delayed and self.delayed[0][0] <= now:
+                _, priority, seq, job = heapq.heappop(self.delayed)
+                heapq.heappush(self.queue, (priority, seq, job))
+            if now - self._pruned_at >= BUCKET_PRUNE_INTERVAL:
+                self._prune(now)
+
+            while self.queue:
+                priority, seq, job = heapq.heappop(self.queue)
+                if job.future.done():
+                    continue  # drop()으로 취소된 작업
+                if job.key is not None and self.keyed.get(job.key) is not job:
+                    continue  # upgrade() 전의 항목 - 이미 실행을 시작함
+                if lease is not None and not lease.held:
+                    # 리스가 없는 인스턴스는 채널을 변경하지 않음 (리더와 중복 삭제 방지)
+                    if job.key is not None:
+                        del self.keyed[job.key]
+                    job.future.set_exception(OperationDropped(job.key))
+                    self.pending -= 1
+                    self.dropped += 1
+                    continue
+                delay = self._reserve(job)
+                if delay > 0:
+                    # 순서(seq)는 그대로 두고 토큰이 생길 때 큐로 되돌림
+                    heapq.heappush(self.delayed, (now + delay, priority, seq, job))
+                    continue
+                self.pending -= 1
+                if job.key is not None:
+                    del self.keyed[job.key]  # 실행이 시작된 작업에는 더 이상 합치지 않음
+                return job
+
+            self._wakeup.clear()
+            timeout = self.delayed[0][0] - now if self.delayed else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _worker(self):
+        while True:
+            job = await self._next_job()
+
+            waited = time.monotonic() - job.queued_at
+            self.wait_total[job.priority] += waited
+            self.wait_count[job.priority] += 1
+            self.wait_max[job.priority] = max(self.wait_max[job.priority], waited)
+
+            started = time.perf_counter()
+            try:
+                result = await job.factory()
+            except Exception as e:
+                if isinstance(e, discord.RateLimited) or getattr(e, 'status', None) == 429:
+                    # 재시도 시간이 너무 길거나(RateLimited) Cloudflare 차단인 경우만 여기까지 올라옴
+                    self.record_rate_limit(job.route, job.guild_id)
+                if not job.future.done():
+                    job.future.set_exception(e)
+            else:
+                if not job.future.done():
+                    job.future.set_result(result)
+            finally:
+                self.route_latency[job.route].observe(time.perf_counter() - started)
+            self.executed += 1
+
+    def record_rate_limit(self, route, guild_id=None):
+        self.rate_limited += 1
+        self.rate_limited_counter.inc()
+        logger.warning("🚦 REST 429 발생: %s", route, extra={'event': 'rest_429', 'guild': guild_id})
+
+    def stats(self):
+        return {
+            'queue_depth': self.pending,
+            'executed': self.executed,
+            'dropped': self.dropped,
+            'rate_limited': self.rate_limited,
+            'wait_ms': {
+                name: {
+                    'avg': round(self.wait_total[i] / self.wait_count[i] * 1000, 1) if self.wait_count[i] else 0.0,
+                    'max': round(self.wait_max[i] * 1000, 1)
+                }
+                for i, name in enumerate(PRIORITY_NAMES)
+            }
+        }
+
+rest_scheduler = RestScheduler()
+
+class RateLimitLogCounter(logging.Filter):
+    """discord.py가 내부에서 기다렸다 재시도하는 429는 예외로 올라오지 않으므로 경고 로그로 셈"""
+
+    def filter(self, record):
+        # 'Timeout ... erroring instead' 경고는 RateLimited 예외로 스케줄러가 따로 셈
+        msg = record.msg
+        if isinstance(msg, str) and msg.startswith('We are being rate limited.') and 'Retrying in' in msg:
+            method, url = record.args[0], record.args[1]
+            rest_scheduler.record_rate_limit(f"{method} {url}")
+        return True
+
+logging.getLogger('discord.http').addFilter(RateLimitLogCounter())
+
+
+TEMP_CATEGORY_NAME = "🔊 임시 통화방"
+SLOT_NAME_PATTERN = re.compile(r"^(\d+인방)(?: #(\d+))?$")
+
+class SlotAllocator:
+    """이름별 사용 중인 번호 집합 - 가장 작은 빈 번호를 O(log n)에 반환
+
+    next_number 아래의 번호는 사용 중이거나 free 힙에 있음. 그 위에서 mark()된 번호는
+    used에만 넣고 acquire()가 지나가며 건너뛰므로, 사용자가 채널 이름을 '#999999999'로
+    바꿔도 사이 번호를 만들지 않음 (메모리는 실제 채널 수에만 비례).
+    """
+    __slots__ = ('used', 'free', 'next_number')
+
+    def __init__(self):
+        self.used = set()
+        self.free = []  # next_number 아래에서 반납된 번호 (min-heap, 지연 삭제)
+        self.next_number = 1
+
+    def acquire(self):
+        while self.free:
+            number = heapq.heappop(self.free)
+            if number not in self.used and number < self.next_number:
+                self.used.add(number)
+                return number
+        while self.next_number in self.used:
+            self.next_number += 1  # mark()로 먼저 잡힌 번호 - 전체로 보면 번호당 한 번만 지나감
+        number = self.next_number
+        self.next_number += 1
+        self.used.add(number)
+        return number
+
+    def mark(self, number):
+        """이미 존재하는 채널 번호를 사용 중으로 표시"""
+        self.used.add(number)
+
+    def release(self, number):
+        if number in self.used:
+            self.used.discard(number)
+            if number < self.next_number:
+                heapq.heappush(self.free, number)
+
+class ChannelSlotIndex:
+    """길드별 임시 카테고리와 'N인방 #k' 번호를 메모리에서 관리"""
+
+    def __init__(self):
+        self.categories = {}      # guild_id -> category_id
+        self.allocators = {}      # category_id -> {base_name: SlotAllocator}
+        self.channel_slots = {}   # channel_id -> (category_id, base_name, number)
+        self._pending = {}        # guild_id -> 카테고리 생성 중인 Task (single-flight)
+
+    @staticmethod
+    def format_name(base_name, number):
+        return base_name if number == 1 else f"{base_name} #{number}"
+
+    async def resolve_category(self, guild):
+        """임시 카테고리 조회 - 동시에 여러 번 호출돼도 생성은 한 번만 수행"""
+        category_id = self.categories.get(guild.id)
+        if category_id is not None:
+            category = guild.get_channel(category_id)
+            if category is not None:
+                return category
+            self.forget_category(category_id)
+
+        pending = self._pending.get(guild.id)
+        if pending is None:
+            pending = asyncio.ensure_future(self._load_category(guild))
+            self._pending[guild.id] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(guild.id, None))
+        return await asyncio.shield(pending)
+
+    async def _load_category(self, guild):
+        name = guild_config.get(guild.id).category_name
+        category = discord.utils.get(guild.categories, name=name)
+        if not category:
+            category = await rest_scheduler.submit(
+                'create_category', guild.id, PRIORITY_CLICK,
+                lambda: guild.create_category(name)
+            )
+            logger.info(f"📁 임시 카테고리 생성됨: {guild.name}")
+
+        self.categories[guild.id] = category.id
+        self.allocators.setdefault(category.id, {})
+        # 기존 채널 이름으로 인덱스 초기화 (카테고리당 한 번)
+        for channel in category.voice_channels:
+            self.track(channel)
+        return category
+
+    def forget_category(self, category_id):
+        for guild_id, known_id in list(self.categories.items()):
+            if known_id == category_id:
+                del self.categories[guild_id]
+        self.allocators.pop(category_id, None)
+        for channel_id, slot in list(self.channel_slots.items()):
+            if slot[0] == category_id:
+                del self.channel_slots[channel_id]
+
+    def acquire(self, category, limit):
+        """새 채널 이름을 예약하고 (이름, 슬롯) 반환"""
+        base_name = f"{limit}인방"
+        allocator = self.allocators.setdefault(category.id, {}).setdefault(base_name, SlotAllocator())
+        number = allocator.acquire()
+        return self.format_name(base_name, number), (category.id, base_name, number)
+
+    def bind(self, channel_id, slot):
+        """예약한 슬롯을 실제 생성된 채널에 연결"""
+        self.channel_slots[channel_id] = slot
+
+    def cancel(self, slot):
+        """채널 생성에 실패했을 때 예약 취소"""
+        category_id, base_name, number = slot
+        allocator = self.allocators.get(category_id, {}).get(base_name)
+        if allocator:
+            allocator.release(number)
+
+    def track(self, channel):
+        """카테고리 안의 채널을 이름 기준으로 인덱스에 반영"""
+        if channel.id in self.channel_slots or channel.category_id not in self.allocators:
+            return
+        match = SLOT_NAME_PATTERN.match(channel.name)
+        if not match:
+            return
+        base_name = match.group(1)
+        number = int(match.group(2) or 1)
+        self.allocators[channel.category_id].setdefault(base_name, SlotAllocator()).mark(number)
+        self.channel_slots[channel.id] = (channel.category_id, base_name, number)
+
+    def release(self, channel_id):
+        """채널 삭제 시 번호 반납 (여러 번 호출해도 안전)"""
+        slot = self.channel_slots.pop(channel_id, None)
+        if slot:
+            self.cancel(slot)
+
+channel_slots = ChannelSlotIndex()
+
+class TimerWheel:
+    """채널 삭제 타이머 - 해시 타이머 휠 하나가 모든 만료를 관리 (arm/cancel O(1))"""
+
+    def __init__(self, slots=64, resolution=1.0):
+        self.resolution = resolution
+        self.buckets = [{} for _ in range(slots)]  # slot -> {key: (deadline, callback)}
+        self.entries = {}                          # key -> slot
+        self.origin = time.monotonic()
+        self.current_tick = 0
+        self._task = None
+        # 발화 지연 통계
+        self.fired = 0
+        self.total_lateness = 0.0
+        self.max_lateness = 0.0
+        self.last_lateness = 0.0
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def arm(self, key, delay, callback):
+        """delay초 뒤 callback(key) 실행 - 이미 있으면 다시 설정"""
+        self.cancel(key)
+        deadline = time.monotonic() + delay
+        tick = max(math.ceil((deadline - self.origin) / self.resolution), self.current_tick + 1)
+        slot = tick % len(self.buckets)
+        self.buckets[slot][key] = (deadline, callback)
+        self.entries[key] = slot
+
+    def cancel(self, key):
+        slot = self.entries.pop(key, None)
+        if slot is None:
+            return False
+        self.buckets[slot].pop(key, None)
+        return True
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def run(self):
+        """드라이버 코루틴 - 틱마다 만료된 타이머를 한 번에 실행"""
+        # 멈춰 있던 동안의 틱을 한꺼번에 돌지 않도록 기준 시각을 현재 틱에 다시 맞춤
+        self.origin = time.monotonic() - self.current_tick * self.resolution
+        while True:
+            next_tick_at = self.origin + (self.current_tick + 1) * self.resolution
+            await asyncio.sleep(max(0.0, next_tick_at - time.monotonic()))
+
+            now = time.monotonic()
+            due = []
+            # 루프가 밀렸으면 지나간 틱을 모두 따라잡음
+            while self.origin + (self.current_tick + 1) * self.resolution <= now:
+                self.current_tick += 1
+                bucket = self.buckets[self.current_tick % len(self.buckets)]
+                for key, (deadline, callback) in list(bucket.items()):
+                    if deadline <= now:
+                        del bucket[key]
+                        del self.entries[key]
+                        due.append((key, deadline, callback))
+
+            for key, deadline, callback in due:
+                lateness = now - deadline
+                self.fired += 1
+                self.total_lateness += lateness
+                self.last_lateness = lateness
+                self.max_lateness = max(self.max_lateness, lateness)
+                asyncio.create_task(callback(key))
+
+    def stats(self):
+        return {
+            'pending': len(self.entries),
+            'fired': self.fired,
+            'avg_late_ms': round(self.total_lateness / self.fired * 1000, 1) if self.fired else 0.0,
+            'max_late_ms': round(self.max_lateness * 1000, 1),
+            'last_late_ms': round(self.last_lateness * 1000, 1)
+        }
+
+expiry_timers = TimerWheel()
+
+def untrack_channel(channel_id):
+    """채널 추적 정보, 타이머, 번호 슬롯을 한 번에 정리"""
+    record = channel_registry.remove(channel_id)
+    if record is not None:
+        channel_list_cache.discard(record.guild_id, channel_id)
+        analytics.on_delete(record)
+    expiry_timers.cancel(channel_id)
+    channel_slots.release(channel_id)
+    channel_journal.record_delete(channel_id)
+    status_snapshot.invalidate()
+
+# 클러스터 워커마다 자기 길드의 상태만 따로 기록
+JOURNAL_PATH = os.environ.get(
+    'CHANNEL_JOURNAL_PATH',
+    f'channel_journal.cluster{CLUSTER_ID}.jsonl' if CLUSTER_ID is not None else 'channel_journal.jsonl'
+)
+JOURNAL_COMPACT_MIN = 500  # 이 줄 수를 넘고 살아있는 항목보다 4배 많으면 압축
+
+class ChannelJournal:
+    """임시 채널 상태를 append-only 파일에 기록해 재시작 후에도 복구"""
+
+    def __init__(self, path):
+        self.path = path
+        self.records = {}  # channel_id -> 마지막 상태
+        self.lines = 0
+        self.restored = False
+        self._file = None
+        self._inode = None  # follow()가 읽고 있는 파일 (압축으로 교체되면 바뀜)
+        self._offset = 0    # 그 파일에서 이미 재생한 바이트 수
+
+    def load(self):
+        """저널을 재생해 살아있는 채널 목록을 만들고 바로 압축 (follow로 읽어 둔 부분은 이어서)"""
+        self.follow()
+        self.compact()
+        return dict(self.records)
+
+    def follow(self):
+        """마지막으로 읽은 위치부터 저널을 이어서 재생 - 스탠바이가 리더의 기록을 따라갈 때 사용
+
+        리더가 압축해서 파일이 교체됐으면 처음부터 다시 읽고, 쓰다 만 마지막 줄은 다음 호출로 미룸.
+        """
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return 0
+        with f:
+            stat = os.fstat(f.fileno())
+            if (stat.st_dev, stat.st_ino) != self._inode or stat.st_size < self._offset:
+                self.records = {}
+                self._inode = (stat.st_dev, stat.st_ino)
+                self._offset = 0
+            f.seek(self._offset)
+            data = f.read()
+
+        end = data.rfind(b'\n') + 1
+        applied = 0
+        for line in data[:end].splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # 비정상 종료로 잘린 줄
+            self._apply(entry)
+            applied += 1
+        self._offset += end
+        return applied
+
+    def _apply(self, entry):
+        channel_id = entry['id']
+        if entry['op'] == 'put':
+            self.records[channel_id] = entry
+        elif channel_id not in self.records:
+            return
+        elif entry['op'] == 'used':
+            self.records[channel_id]['has_been_used'] = True
+        elif entry['op'] == 'timer':
+            self.records[channel_id]['expires_at'] = entry['expires_at']
+        elif entry['op'] == 'del':
+            del self.records[channel_id]
+
+    def _append(self, entry):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._file.flush()
+        self.lines += 1
+        if self.lines > JOURNAL_COMPACT_MIN and self.lines > 4 * len(self.records):
+            self.compact()
+
+    def record_create(self, record):
+        entry = {
+            'op': 'put',
+            'id': record.channel_id,
+            'guild_id': record.guild_id,
+            'creator': record.creator,
+            'limit': record.limit,
+            'created_at': record.created_at,
+            'has_been_used': record.has_been_used,
+            'auto_created': record.auto_created
+        }
+        self.records[record.channel_id] = entry
+        self._append(entry)
+
+    def record_used(self, channel_id):
+        entry = self.records.get(channel_id)
+        if entry and not entry['has_been_used']:
+            entry['has_been_used'] = True
+            self._append({'op': 'used', 'id': channel_id})
+
+    def record_timer(self, channel_id, expires_at):
+        entry = self.records.get(channel_id)
+        if entry is not None:
+            entry['expires_at'] = expires_at
+            self._append({'op': 'timer', 'id': channel_id, 'expires_at': expires_at})
+
+    def record_delete(self, channel_id):
+        if self.records.pop(channel_id, None) is not None:
+            self._append({'op': 'del', 'id': channel_id})
+
+    def compact(self):
+        """살아있는 항목만 새 파일에 쓰고 원자적으로 교체"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in self.records.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        os.replace(tmp_path, self.path)
+        self.lines = len(self.records)
+        stat = os.stat(self.path)
+        self._inode = (stat.st_dev, stat.st_ino)
+        self._offset = stat.st_size
+
+channel_journal = ChannelJournal(JOURNAL_PATH)
+
+# 웜 스탠바이 - 같은 리스 파일을 쓰는 인스턴스 중 락을 잡은 하나만 게이트웨이에 연결
+STANDBY_LEASE_PATH = os.environ.get('STANDBY_LEASE_PATH')
+if STANDBY_LEASE_PATH and CLUSTER_ID is not None:
+    STANDBY_LEASE_PATH = f"{STANDBY_LEASE_PATH}.cluster{CLUSTER_ID}"
+STANDBY_POLL_INTERVAL = float(os.environ.get('STANDBY_POLL_INTERVAL', 1.0))
+
+class LeaseLost(RuntimeError):
+    """리더가 리스를 잃고 연결을 끊음 - 0으로 끝나면 ON_FAILURE 재시작 정책이 다시 띄우지 않음"""
+
+class Lease:
+    """파일 락(flock) 기반 리더 리스 - 리더 프로세스가 죽으면 커널이 락을 바로 풀어줌"""
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = None
+        self.epoch = 0          # 리스를 잡을 때마다 증가하는 세대 번호
+        self.acquired_at = None
+        self.lost = False       # 잡았던 리스를 잃음 - 프로세스를 비정상 종료해 스탠바이로 재시작
+
+    @property
+    def held(self):
+        return self.fd is not None
+
+    def acquire(self):
+        """락을 잡으면 True (기다리지 않음)"""
+        if self.fd is not None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+
+        try:
+            self.epoch = int(os.pread(fd, 32, 0) or 0) + 1
+        except ValueError:
+            self.epoch = 1
+        os.ftruncate(fd, 0)
+        os.pwrite(fd, str(self.epoch).encode(), 0)
+        os.fsync(fd)
+        self.fd = fd
+        self.acquired_at = datetime.now()
+        return True
+
+    def verify(self):
+        """리스 파일이 지워지거나 교체되면 다른 인스턴스가 새 파일에 락을 잡을 수 있으므로 리스를 잃은 것으로 처리"""
+        if self.fd is None:
+            return False
+        try:
+            same = os.fstat(self.fd).st_ino == os.stat(self.path).st_ino
+        except FileNotFoundError:
+            same = False
+        if not same:
+            self.release()
+        return same
+
+    def release(self):
+        if self.fd is not None:
+            os.close(self.fd)  # 닫으면 flock도 풀림
+            self.fd = None
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'held': self.held,
+            'epoch': self.epoch,
+            'acquired_at': self.acquired_at.isoformat() if self.acquired_at else None
+        }
+
+if STANDBY_LEASE_PATH and fcntl is None:
+    logger.error("❌ 이 플랫폼은 flock을 지원하지 않아 웜 스탠바이 없이 실행합니다.")
+lease = Lease(STANDBY_LEASE_PATH) if STANDBY_LEASE_PATH and fcntl is not None else None
+
+async def wait_for_lease():
+    """스탠바이 - 리스를 잡을 때까지 리더의 저널을 따라 읽으며 대기"""
+    await state_prepared  # 저널 첫 재생은 시작 준비 스레드가 수행
+    bot_status['role'] = 'standby'
+    status_snapshot.invalidate()
+    logger.info(f"🕒 스탠바이 대기 중 (리스: {lease.path})")
+    while not lease.acquire():
+        channel_journal.follow()
+        await asyncio.sleep(STANDBY_POLL_INTERVAL)
+    channel_journal.follow()
+    bot_status['role'] = 'leader'
+    status_snapshot.invalidate()
+    logger.info(f"👑 리스 획득 (세대 {lease.epoch}), 저널 항목 {len(channel_journal.records)}개로 인계받음")
+
+async def watch_lease():
+    """리스를 잃으면 두 인스턴스가 같은 채널을 지우지 않도록 즉시 연결 종료"""
+    while True:
+        await asyncio.sleep(STANDBY_POLL_INTERVAL)
+        if lease.held and not lease.verify():
+            logger.error("🚨 리스를 잃었습니다. 중복 삭제를 막기 위해 연결을 종료합니다.")
+            lease.lost = True
+            await bot.close()
+            return
+
+def track_channel(record, channel=None):
+    """새 임시 채널을 레지스트리와 저널에 등록"""
+    channel_registry.add(record)
+    channel_journal.record_create(record)
+    channel_list_cache.update(record, channel)
+    analytics.on_create(record)
+    status_snapshot.invalidate()
+
+def arm_empty_timer(channel_id, delay=None):
+    """빈 채널 삭제 타이머 - 만료 시각을 저널에도 남겨 스탠바이 전환/재시작 후 남은 시간만 기다림"""
+    if delay is None:
+        record = channel_registry.get(channel_id)
+        delay = guild_config.get(record.guild_id if record else None).empty_timeout
+    expiry_timers.arm(channel_id, delay, expire_empty_channel)
+    channel_journal.record_timer(channel_id, time.time() + delay)
+
+def mark_channel_used(channel_id):
+    record = channel_registry.get(channel_id)
+    if record and not record.has_been_used:
+        record.has_been_used = True
+        channel_journal.record_used(channel_id)
+        status_snapshot.invalidate()
+
+BULK_DELETE_CONCURRENCY = 5
+
+async def delete_channels_bounded(channels, priority=PRIORITY_CLEANUP, concurrency=BULK_DELETE_CONCURRENCY, recycle=True):
+    """여러 채널을 최대 concurrency개씩 동시에 삭제하고 (성공 수, 실패 수) 반환
+
+    실제 호출 속도는 REST 스케줄러의 토큰 버킷이 조절하고,
+    재입장으로 취소된 채널은 어느 쪽에도 세지 않음. recycle=False면 풀 모드에서도 항상 삭제.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def delete_one(channel):
+        async with semaphore:
+            try:
+                await dispose_channel(channel, priority, recycle)
+            except discord.NotFound:
+                pass  # 이미 삭제됨
+            except OperationDropped:
+                return None
+            except Exception as e:
+                logger.error("❌ 채널 삭제 오류 (%s): %s", channel.name, e,
+                             extra={'event': 'channel_delete_error', 'guild': channel.guild.id, 'channel': channel.id})
+                return False
+            untrack_channel(channel.id)
+            return True
+
+    results = await asyncio.gather(*(delete_one(channel) for channel in channels))
+    return results.count(True), results.count(False)
+
+# 준비 시점에 사용 불가였던 길드의 저널 항목 - guild_id -> {channel_id}
+deferred_restores = {}
+
+def restore_entry(channel_id, entry, channel):
+    """저널 항목 하나를 레지스트리에 복구하고, 재시작 중에 비워진 채널이면 반환 (삭제 대상)"""
+    created_at = entry['created_at']
+    if isinstance(created_at, str):
+        created_at = datetime.fromisoformat(created_at).timestamp()  # 이전 형식 저널
+    record = ChannelRecord(
+        channel_id, entry['guild_id'], entry['creator'], entry['limit'],
+        created_at=created_at,
+        has_been_used=entry['has_been_used'],
+        auto_created=entry['auto_created']
+    )
+    channel_registry.add(record)
+    channel_list_cache.update(record, channel)
+
+    # 재시작 전에 만든 채널도 생성으로 셈 - 삭제만 세면 삭제/미사용이 생성보다 많아짐 (인원은 복구 끝에 다시 셈)
+    analytics.on_create(record)
+
+    if channel.members and not entry['auto_created']:
+        mark_channel_used(channel_id)
+    elif entry['auto_created'] or entry['has_been_used']:
+        # 재시작 중에 비워진 채널 - 바로 삭제
+        return channel
+    else:
+        # 리더가 걸어 둔 타이머가 있으면 남은 시간만 기다림
+        expires_at = entry.get('expires_at')
+        arm_empty_timer(channel_id, max(0.0, expires_at - time.time()) if expires_at else None)
+    return None
+
+async def restore_channels():
+    """저널과 게이트웨이 캐시를 한 번에 대조해 상태 복구 (REST 조회 없음)
+
+    길드가 아직 캐시에 없거나 사용 불가(장애, 늦은 GUILD_CREATE)면 항목을 지우지 않고
+    남겨 두었다가 on_guild_available에서 복구.
+    """
+    started = time.perf_counter()
+    entries = channel_journal.load()
+    restored, orphans, missing, deferred = 0, [], 0, 0
+
+    for channel_id, entry in entries.items():
+        guild = bot.get_guild(entry['guild_id'])
+        if guild is None or guild.unavailable:
+            deferred_restores.setdefault(entry['guild_id'], set()).add(channel_id)
+            deferred += 1
+            continue
+        channel = guild.get_channel(channel_id)
+        if channel is None:
+            channel_journal.record_delete(channel_id)
+            missing += 1
+            continue
+
+        orphan = restore_entry(channel_id, entry, channel)
+        if orphan is not None:
+            orphans.append(orphan)
+        restored += 1
+
+    analytics.recount()
+    deleted, _ = await delete_channels_bounded(orphans)
+    channel_journal.restored = True
+    elapsed = (time.perf_counter() - started) * 1000
+    logger.info(f"📒 채널 상태 복구 완료: {restored}개 복구, {deleted}개 정리, "
+                f"{missing}개 누락, {deferred}개 보류 ({elapsed:.1f}ms)")
+
+async def restore_deferred(guild):
+    """사용 가능해진 길드의 보류된 저널 항목 복구"""
+    channel_ids = deferred_restores.pop(guild.id, None)
+    if not channel_ids:
+        return
+    orphans, restored, missing = [], 0, 0
+    for channel_id in channel_ids:
+        entry = channel_journal.records.get(channel_id)
+        if entry is None or channel_id in channel_registry:
+            continue
+        channel = guild.get_channel(channel_id)
+        if channel is None:
+            channel_journal.record_delete(channel_id)
+            missing += 1
+            continue
+        orphan = restore_entry(channel_id, entry, channel)
+        if orphan is not None:
+            orphans.append(orphan)
+        restored += 1
+    analytics.recount(guild.id)
+    deleted, _ = await delete_channels_bounded(orphans)
+    logger.info(f"📒 보류된 채널 복구 ({guild.name}): {restored}개 복구, {deleted}개 정리, {missing}개 누락")
+
+# 채널 풀 설정 (환경변수로 켜고 끔)
+POOL_ENABLED = os.environ.get('CHANNEL_POOL_ENABLED', '').lower() in ('1', 'true', 'yes')
+POOL_WARM_SIZE = int(os.environ.get('CHANNEL_POOL_SIZE', 3))
+POOL_MAX_SIZE = int(os.environ.get('CHANNEL_POOL_MAX', 10))
+POOL_CHANNEL_NAME = "⏳ 대기 채널"
+
+# 길드별 설정 - 기본값은 위의 상수, 바뀐 값만 SQLite에 저장
+GUILD_CONFIG_PATH = os.environ.get('GUILD_CONFIG_PATH', 'guild_config.sqlite3')
+CONFIG_RELOAD_INTERVAL = float(os.environ.get('CONFIG_RELOAD_INTERVAL', 5.0))  # 외부 변경 확인 주기 (초)
+PANEL_MAX_BUTTONS = 25  # 메시지 하나에 붙일 수 있는 버튼 수 (5줄 x 5개)
+
+def parse_int_setting(low, high):
+    def parse(text):
+        try:
+            value = int(str(text).strip())
+        except ValueError:
+            raise ValueError("숫자를 입력해주세요.")
+        if not low <= value <= high:
+            raise ValueError(f"{low}~{high} 사이의 값이어야 합니다.")
+        return value
+    return parse
+
+def parse_category_name(text):
+    name = str(text).strip()
+    if not 1 <= len(name) <= 100:
+        raise ValueError("1~100자 사이의 이름이어야 합니다.")
+    return name
+
+def parse_limits(text):
+    """'1,2,3,4,5' 또는 저장된 목록 → 정렬된 튜플"""
+    parts = text if isinstance(text, (list, tuple)) else [part for part in re.split(r'[\s,]+', str(text)) if part]
+    try:
+        limits = tuple(sorted(set(int(part) for part in parts)))
+    except ValueError:
+        raise ValueError("쉼표로 구분한 숫자를 입력해주세요. (예: 1,2,3,4,5)")
+    if not limits or not 1 <= limits[0] <= limits[-1] <= 99:
+        raise ValueError("인원은 1~99 사이여야 합니다.")
+    if len(limits) > PANEL_MAX_BUTTONS:
+        raise ValueError(f"버튼은 최대 {PANEL_MAX_BUTTONS}개까지 만들 수 있습니다.")
+    return limits
+
+# 키 -> (기본값, 검증 함수, 설명)
+GUILD_SETTINGS = {
+    'category_name': (TEMP_CATEGORY_NAME, parse_category_name, '임시 카테고리 이름'),
+    'empty_timeout': (30, parse_int_setting(5, 3600), '빈 채널 자동 삭제 대기 (초)'),
+    'limits': ((1, 2, 3, 4, 5), parse_limits, '패널 버튼 인원 목록'),
+    'keeper_interval': (600, parse_int_setting(60, 86400), 'Keep-Alive 채널 생성 주기 (초)'),
+    'keeper_ttl': (5, parse_int_setting(1, 300), 'Keep-Alive 채널 유지 시간 (초)'),
+    'pool_size': (POOL_WARM_SIZE, parse_int_setting(0, 25), '미리 만들어 둘 대기 채널 수'),
+    'pool_max': (POOL_MAX_SIZE, parse_int_setting(0, 50), '대기 채널 최대 보관 수')
+}
+
+class GuildSettings:
+    """길드 하나의 설정 (기본값 + 저장된 값) - 바뀌면 객체를 통째로 교체"""
+    __slots__ = tuple(GUILD_SETTINGS) + ('overrides',)
+
+    def __init__(self, overrides=None):
+        self.overrides = overrides or {}
+        for key, (default, _, _) in GUILD_SETTINGS.items():
+            setattr(self, key, self.overrides.get(key, default))
+
+    def as_dict(self):
+        return {key: getattr(self, key) for key in GUILD_SETTINGS}
+
+class GuildConfigStore:
+    """길드별 설정을 SQLite에 두고 메모리 캐시에서 읽음 - 이벤트 처리 중에는 디스크를 읽지 않음
+
+    직접 바꾼 값은 캐시에 바로 반영하고, 다른 프로세스(클러스터 워커, sqlite3 CLI)가 바꾼 값은
+    PRAGMA data_version이 바뀌었을 때만 전체를 다시 읽어 재시작 없이 적용.
+    """
+
+    def __init__(self, path, on_change):
+        self.path = path
+        self.on_change = on_change  # (guild_id, 바뀐 키 집합) 콜백
+        self.db = None
+        self.cache = {}             # guild_id -> GuildSettings (저장된 값이 있는 길드만)
+        self.defaults = GuildSettings()
+        self.data_version = None
+        self.reloads = 0
+        self.writes = 0
+
+    def open(self):
+        """시작 시 스레드에서 호출 - 이후에는 이벤트 루프에서만 사용"""
+        import sqlite3  # 설정 DB를 열 때만 필요
+        self.db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS guild_config ('
+            'guild_id INTEGER NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, updated_at REAL NOT NULL, '
+            'PRIMARY KEY (guild_id, key))'
+        )
+        self.cache = self._read_all()
+        self.data_version = self._data_version()
+        logger.info(f"⚙️ 길드 설정 로드됨: {len(self.cache)}개 길드 ({self.path})")
+
+    def get(self, guild_id):
+        """저장된 값이 없는 길드는 공용 기본값 객체 (디스크 조회 없음)"""
+        return self.cache.get(guild_id, self.defaults)
+
+    def _data_version(self):
+        return self.db.execute('PRAGMA data_version').fetchone()[0]
+
+    def _read_all(self):
+        overrides = {}
+        for guild_id, key, value in self.db.execute('SELECT guild_id, key, value FROM guild_config'):
+            if key not in GUILD_SETTINGS:
+                continue  # 이전 버전에서 쓰던 키
+            try:
+                overrides.setdefault(guild_id, {})[key] = GUILD_SETTINGS[key][1](json.loads(value))
+            except ValueError as e:
+                logger.warning(f"⚠️ 잘못된 길드 설정 무시 (길드 {guild_id}, {key}): {e}")
+        return {guild_id: GuildSettings(values) for guild_id, values in overrides.items()}
+
+    def _replace(self, guild_id, overrides):
+        before = self.get(guild_id)
+        if overrides:
+            self.cache[guild_id] = GuildSettings(overrides)
+        else:
+            self.cache.pop(guild_id, None)
+        after = self.get(guild_id)
+        changed = {key for key in GUILD_SETTINGS if getattr(before, key) != getattr(after, key)}
+        if changed:
+            self.on_change(guild_id, changed)
+        return changed
+
+    def set(self, guild_id, key, text):
+        """값을 검증해 저장 - 잘못된 값이면 ValueError"""
+        value = GUILD_SETTINGS[key][1](text)
+        self.db.execute(
+            'INSERT OR REPLACE INTO guild_config (guild_id, key, value, updated_at) VALUES (?, ?, ?, ?)',
+            (guild_id, key, json.dumps(value, ensure_ascii=False), time.time())
+        )
+        self.writes += 1
+        self._replace(guild_id, {**self.get(guild_id).overrides, key: value})
+        return value
+
+    def reset(self, guild_id, key=None):
+        """키 하나(또는 전체)를 기본값으로 되돌림"""
+        if key is None:
+            self.db.execute('DELETE FROM guild_config WHERE guild_id = ?', (guild_id,))
+            overrides = {}
+        else:
+            self.db.execute('DELETE FROM guild_config WHERE guild_id = ? AND key = ?', (guild_id, key))
+            overrides = {k: v for k, v in self.get(guild_id).overrides.items() if k != key}
+        self.writes += 1
+        self._replace(guild_id, overrides)
+
+    def reload(self):
+        """다른 연결이 커밋했을 때만 다시 읽고 바뀐 길드 수 반환"""
+        version = self._data_version()
+        if version == self.data_version:
+            return 0
+        self.data_version = version
+        fresh = self._read_all()
+        changed = 0
+        for guild_id in set(self.cache) | set(fresh):
+            new = fresh.get(guild_id)
+            if self._replace(guild_id, new.overrides if new else {}):
+                changed += 1
+        self.reloads += 1
+        if changed:
+            logger.info(f"🔄 길드 설정 다시 읽음: {changed}개 길드 변경")
+        return changed
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(CONFIG_RELOAD_INTERVAL)
+            if self.db is not None:
+                self.reload()
+
+    def stats(self):
+        return {'path': self.path, 'configured_guilds': len(self.cache), 'reloads': self.reloads, 'writes': self.writes}
+
+class ChannelPool:
+    """미리 만들어 둔 숨김 채널을 길드별로 보관하고 재사용"""
+
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.idle = {}       # guild_id -> deque[channel_id]
+        self._refills = {}   # guild_id -> 보충 중인 Task
+
+    def size(self, guild_id):
+        return len(self.idle.get(guild_id, ()))
+
+    @staticmethod
+    def hidden_overwrites(guild):
+        return {
+            guild.default_role: discord.PermissionOverwrite(view_channel=False, connect=False),
+            guild.me: discord.PermissionOverwrite(view_channel=True, manage_channels=True)
+        }
+
+    async def claim(self, guild, name, limit, overwrites):
+        """풀에서 채널을 꺼내 이름/인원/권한을 한 번의 edit로 설정 (없으면 None)"""
+        if not self.enabled:
+            return None
+
+        idle = self.idle.get(guild.id)
+        channel = None
+        while idle and channel is None:
+            channel = guild.get_channel(idle.popleft())
+
+        self.schedule_refill(guild)
+        if channel is None:
+            return None
+
+        try:
+            await rest_scheduler.submit(
+                'edit_channel', guild.id, PRIORITY_CLICK,
+                lambda: channel.edit(
+                    name=name,
+                    user_limit=limit,
+                    overwrites=overwrites
+                ),
+                channel_id=channel.id
+            )
+        except discord.NotFound:
+            return None
+        return channel
+
+    async def recycle(self, channel):
+        """빈 채널을 풀로 되돌림 - 사람이 있거나 풀이 가득 찼거나 실패하면 False"""
+        if not self.enabled or channel.members:
+            return False
+
+        idle = self.idle.setdefault(channel.guild.id, deque())
+        settings = guild_config.get(channel.guild.id)
+        if len(idle) >= max(settings.pool_max, settings.pool_size):
+            return False
+
+        try:
+            await channel.edit(
+                name=POOL_CHANNEL_NAME,
+                overwrites=self.hidden_overwrites(channel.guild)
+            )
+        except Exception as e:
+            logger.error(f"❌ 채널 풀 반납 오류: {e}")
+            return False
+
+        idle.append(channel.id)
+        return True
+
+    def discard(self, channel_id, guild_id):
+        idle = self.idle.get(guild_id)
+        if idle and channel_id in idle:
+            idle.remove(channel_id)
+
+    def schedule_refill(self, guild):
+        if not self.enabled or guild.id in self._refills:
+            return
+        task = asyncio.create_task(self.warm(guild))
+        self._refills[guild.id] = task
+        task.add_done_callback(lambda _: self._refills.pop(guild.id, None))
+
+    async def warm(self, guild):
+        """풀을 길드 설정의 pool_size까지 채움 (재시작 전 남은 대기 채널은 재사용)"""
+        try:
+            category = await channel_slots.resolve_category(guild)
+            idle = self.idle.setdefault(guild.id, deque())
+
+            for channel in category.voice_channels:
+                if (channel.name == POOL_CHANNEL_NAME and channel.id not in idle
+                        and channel.id not in channel_registry and not channel.members):
+                    idle.append(channel.id)
+
+            while len(idle) < guild_config.get(guild.id).pool_size:
+                channel = await rest_scheduler.submit(
+                    'create_channel', guild.id, PRIORITY_KEEPER,
+                    lambda: guild.create_voice_channel(
+                        name=POOL_CHANNEL_NAME,
+                        category=category,
+                        overwrites=self.hidden_overwrites(guild)
+                    )
+                )
+                idle.append(channel.id)
+            logger.info(f"♻️ 채널 풀 준비됨: {guild.name} ({len(idle)}개)")
+        except Exception as e:
+            logger.error(f"❌ 채널 풀 보충 오류 (길드: {guild.name}): {e}")
+
+channel_pool = ChannelPool(POOL_ENABLED)
+
+async def rename_category(category, name):
+    try:
+        await rest_scheduler.submit('edit_channel', category.guild.id, PRIORITY_KEEPER, lambda: category.edit(name=name),
+                                    channel_id=category.id)
+        logger.info(f"📁 임시 카테고리 이름 변경됨: {category.guild.name} → {name}")
+    except Exception as e:
+        logger.error(f"❌ 임시 카테고리 이름 변경 오류 (길드: {category.guild.name}): {e}")
+
+def apply_guild_config(guild_id, changed):
+    """바뀐 설정을 실행 중인 상태에 반영 (타이머/버튼 등 나머지는 다음 사용 때 캐시에서 읽음)"""
+    status_snapshot.invalidate()
+    guild = bot.get_guild(guild_id)
+    if guild is None:
+        return
+    settings = guild_config.get(guild_id)
+    if changed & {'pool_size', 'pool_max'}:
+        channel_pool.schedule_refill(guild)
+    if 'category_name' in changed:
+        category_id = channel_slots.categories.get(guild_id)
+        category = guild.get_channel(category_id) if category_id is not None else None
+        if category is not None and category.name != settings.category_name:
+            asyncio.create_task(rename_category(category, settings.category_name))
+
+guild_config = GuildConfigStore(GUILD_CONFIG_PATH, apply_guild_config)
+
+async def dispose_channel(channel, priority=PRIORITY_CLEANUP, recycle=True):
+    """빈 임시 채널 정리 - 풀 모드면 재사용, 아니면 삭제
+
+    스케줄러 큐에서 기다리는 동안 멤버가 다시 들어오면 OperationDropped 발생.
+    """
+    async def dispose():
+        if recycle and await channel_pool.recycle(channel):
+            return
+        await channel.delete()
+
+    key = ('dispose', channel.id)
+    if not recycle:
+        # 이미 대기 중인 정리(풀 반납 가능)에 합쳐질 때도 삭제/요청한 우선순위로 실행되게 올림
+        rest_scheduler.upgrade(key, priority, dispose)
+    await rest_scheduler.submit('delete_channel', channel.guild.id, priority, dispose, key=key, channel_id=channel.id)
+
+async def expire_empty_channel(channel_id):
+    """빈 채널 타이머 만료 - 채널별 직렬 큐에서 바로 판단"""
+    channel_settler.request(channel_id, expired=True)
+
+async def evaluate_channel(channel_id, expired):
+    """빈 채널 처리 판단 - 채널당 동시에 하나만 실행됨"""
+    record = channel_registry.get(channel_id)
+    # 자동 생성된 채널은 건드리지 않음
+    if record is None or record.auto_created:
+        return
+    
+    channel = channel_registry.channel(record)
+    if channel is None:
+        # 채널이 이미 삭제된 경우
+        untrack_channel(channel_id)
+        return
+    
+    # 채널에 사람이 있으면 아무것도 하지 않음
+    if len(channel.members) > 0:
+        return
+    
+    if record.has_been_used or expired:
+        # 사용된 적이 있거나 타이머가 끝난 빈 채널은 삭제
+        deleted, _ = await delete_channels_bounded([channel])
+        if deleted:
+            reason = "빈 채널 타이머로" if expired and not record.has_been_used else "사용 후 빈"
+            logger.info("🗑️ %s 채널 삭제됨: %s", reason, channel.name,
+                        extra={'event': 'channel_delete', 'guild': record.guild_id, 'channel': channel_id, 'user': record.creator})
+    elif channel_id not in expiry_timers:
+        # 사용된 적이 없는 채널은 길드 설정 시간만큼 타이머 시작
+        timeout = guild_config.get(record.guild_id).empty_timeout
+        arm_empty_timer(channel_id, timeout)
+        logger.info("⏰ %d초 타이머 시작됨: %s", timeout, channel.name,
+                    extra={'event': 'timer_arm', 'guild': record.guild_id, 'channel': channel_id})
+
+CHANNEL_SETTLE_WINDOW = 1.0  # 마지막 퇴장 후 이 시간 동안 조용하면 판단
+
+class ChannelSettler:
+    """채널별 직렬 처리 - 퇴장 이벤트를 모아 settle 구간마다 한 번만 판단"""
+
+    def __init__(self, evaluate, window):
+        self.evaluate = evaluate
+        self.window = window
+        self.handles = {}    # channel_id -> 대기 중인 판단 (loop.call_later)
+        self.running = {}    # channel_id -> 실행 중인 판단 Task
+        self.flags = {}      # channel_id -> 다음 판단에 전달할 expired 여부
+        self.coalesced = 0   # settle 구간 안에서 합쳐진 이벤트 수
+
+    def touch(self, channel_id):
+        """퇴장 이벤트 - settle 구간을 다시 시작"""
+        handle = self.handles.pop(channel_id, None)
+        if handle is not None:
+            handle.cancel()
+            self.coalesced += 1
+        self.handles[channel_id] = asyncio.get_running_loop().call_later(self.window, self.request, channel_id)
+
+    def request(self, channel_id, expired=False):
+        """판단 요청 - 이미 실행 중이면 끝난 뒤 한 번 더 실행"""
+        handle = self.handles.pop(channel_id, None)
+        if handle is not None:
+            handle.cancel()
+        self.flags[channel_id] = self.flags.get(channel_id, False) or expired
+        if channel_id not in self.running:
+            self.running[channel_id] = asyncio.create_task(self._run(channel_id))
+
+    async def _run(self, channel_id):
+        try:
+            while channel_id in self.flags:
+                expired = self.flags.pop(channel_id)
+                try:
+                    await self.evaluate(channel_id, expired)
+                except Exception as e:
+                    logger.error(f"❌ 채널 상태 판단 오류: {e}")
+        finally:
+            del self.running[channel_id]
+
+    def pending(self):
+        return len(self.handles) + len(self.running)
+
+channel_settler = ChannelSettler(evaluate_channel, CHANNEL_SETTLE_WINDOW)
+
+# 고아 채널 스윕 - 타이머 유실/삭제 실패/재시작으로 남은 채널을 주기적으로 정리
+ORPHAN_SWEEP_INTERVAL = int(os.environ.get('ORPHAN_SWEEP_INTERVAL', 300))
+ORPHAN_SWEEP_GRACE = 60    # 이보다 최근에 만든 채널은 생성 중일 수 있어 건드리지 않음
+ORPHAN_SWEEP_BATCH = 10    # 한 번에 삭제할 채널 수
+ORPHAN_SWEEP_PAUSE = 1.0   # 배치 사이 대기 (초)
+
+class OrphanSweeper:
+    """임시 카테고리의 캐시된 채널과 레지스트리를 길드마다 한 번에 대조 (REST 조회 없음)"""
+
+    def __init__(self):
+        self.suspects = set()   # 지난 스윕에서 캐시에 없던 레지스트리 채널
+        self.sweeps = 0
+        self.last = None
+        self.found = {
+            kind: metrics.counter('voicebot_orphans_found', '스윕에서 발견된 고아 항목', {'kind': kind})
+            for kind in ('orphan', 'stale', 'stuck')
+        }
+        self.deleted = metrics.counter('voicebot_orphans_deleted', '스윕이 삭제한 고아 채널')
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(ORPHAN_SWEEP_INTERVAL)
+            if bot.is_ready():
+                await self.sweep()
+
+    def scan(self, guild, now):
+        """카테고리의 빈 채널 중 (주인 없는 채널, 타이머를 잃은 레코드) 반환"""
+        orphans, stuck = [], []
+        category_id = channel_slots.categories.get(guild.id)
+        if category_id is not None:
+            category = guild.get_channel(category_id)
+        else:
+            category = discord.utils.get(guild.categories, name=guild_config.get(guild.id).category_name)
+        if category is None:
+            return orphans, stuck
+
+        idle = channel_pool.idle.get(guild.id, ())
+        for channel in category.voice_channels:
+            if channel.members:
+                continue
+            record = channel_registry.get(channel.id)
+            # 풀에서 꺼낸 채널은 Discord 생성 시각이 오래전이므로, 추적 중이면 봇이 넘겨준 시각부터 유예
+            created_at = record.created_at if record is not None else channel.created_at.timestamp()
+            if now - created_at < ORPHAN_SWEEP_GRACE:
+                continue
+            if record is None:
+                # 풀의 대기 채널은 주인이 없는 게 정상
+                if channel.id in idle or (channel_pool.enabled and channel.name == POOL_CHANNEL_NAME):
+                    continue
+                orphans.append(channel)
+            elif (channel.id not in expiry_timers and channel.id not in channel_settler.handles
+                    and channel.id not in channel_settler.running):
+                stuck.append(record)
+        return orphans, stuck
+
+    def prune_stale(self):
+        """캐시에 없는 채널을 가리키는 레코드 제거
+
+        재연결 직후처럼 캐시가 잠시 비어 있을 수 있으므로 두 번 연속 없을 때만 제거.
+        """
+        missing = set()
+        for record in list(channel_registry.records.values()):
+            guild = bot.get_guild(record.guild_id)
+            if guild is not None and guild.unavailable:
+                continue
+            if guild is None or guild.get_channel(record.channel_id) is None:
+                missing.add(record.channel_id)
+
+        stale = missing & self.suspects
+        self.suspects = missing - stale
+        for channel_id in stale:
+            untrack_channel(channel_id)
+        return len(stale)
+
+    async def sweep(self):
+        started = time.perf_counter()
+        now = time.time()
+        orphans, stuck = [], []
+        for guild in bot.guilds:
+            if guild.unavailable:
+                continue
+            found, frozen = self.scan(guild, now)
+            orphans.extend(found)
+            stuck.extend(frozen)
+        stale = self.prune_stale()
+
+        # 타이머를 잃은 채널은 원래 경로로 다시 판단
+        for record in stuck:
+            if record.auto_created:
+                expiry_timers.arm(record.channel_id, 0, expire_auto_channel)
+            else:
+                channel_settler.request(record.channel_id, expired=True)
+
+        # 주인 없는 채널은 배치 단위로 천천히 삭제 (클릭 요청보다 낮은 우선순위)
+        deleted = 0
+        for i in range(0, len(orphans), ORPHAN_SWEEP_BATCH):
+            if i:
+                await asyncio.sleep(ORPHAN_SWEEP_PAUSE)
+            ok, _ = await delete_channels_bounded(orphans[i:i + ORPHAN_SWEEP_BATCH])
+            deleted += ok
+
+        self.found['orphan'].inc(len(orphans))
+        self.found['stale'].inc(stale)
+        self.found['stuck'].inc(len(stuck))
+        self.deleted.inc(deleted)
+        self.sweeps += 1
+        self.last = {
+            'at': datetime.now().isoformat(),
+            'orphans': len(orphans),
+            'deleted': deleted,
+            'stale': stale,
+            'stuck': len(stuck),
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+        }
+        if orphans or stale or stuck:
+            logger.info(f"🧹 고아 채널 스윕: 주인 없는 채널 {len(orphans)}개 ({deleted}개 삭제), "
+                        f"끊긴 레코드 {stale}개, 타이머 유실 {len(stuck)}개")
+        status_snapshot.invalidate()
+        return self.last
+
+    def stats(self):
+        return {'sweeps': self.sweeps, 'suspects': len(self.suspects), 'last': self.last}
+
+orphan_sweeper = OrphanSweeper()
+
+class StageLatency:
+    """단계별 지연 히스토그램 - P50/P99는 버킷 경계로 근사"""
+
+    def __init__(self, name, help_text, stages):
+        self.histograms = {stage: metrics.histogram(name, help_text, {'stage': stage}) for stage in stages}
+
+    def record(self, stage, seconds):
+        self.histograms[stage].observe(seconds)
+
+    def percentiles(self):
+        result = {}
+        for stage, histogram in self.histograms.items():
+            p50, p99 = histogram.quantile(0.5), histogram.quantile(0.99)
+            result[stage] = {
+                'p50': round(p50 * 1000, 1) if p50 is not None else None,
+                'p99': round(p99 * 1000, 1) if p99 is not None else None,
+                'count': histogram.count
+            }
+        return result
+
+# 버튼 클릭 → 확인 메시지까지 단계별 지연
+click_latency = StageLatency(
+    'voicebot_click_latency_seconds', '버튼 클릭부터 채널 생성 확인까지 단계별 지연',
+    ('defer', 'queue', 'category', 'create', 'move', 'confirm', 'total')
+)
+voice_state_histogram = metrics.histogram('voicebot_voice_state_handler_seconds', 'on_voice_state_update 처리 시간')
+
+# 스크레이프 시점에만 계산하는 게이지
+metrics.gauge('voicebot_tracked_channels', '길드별 추적 중인 임시 채널 수', lambda: [
+    ({'guild': guild_id}, len(ids)) for guild_id, ids in channel_registry.by_guild.items()
+])
+metrics.gauge('voicebot_pending_timers', '대기 중인 채널 삭제 타이머 수', lambda: [({}, len(expiry_timers))])
+metrics.gauge('voicebot_pending_settles', 'settle 대기/실행 중인 채널 수', lambda: [({}, channel_settler.pending())])
+metrics.gauge('voicebot_settle_coalesced', 'settle 구간 안에서 합쳐진 퇴장 이벤트 누적 수', lambda: [
+    ({}, channel_settler.coalesced)
+])
+metrics.gauge('voicebot_rest_queue_depth', 'REST 스케줄러 대기열 길이', lambda: [({}, rest_scheduler.pending)])
+metrics.gauge('voicebot_event_loop_lag_last_seconds', '마지막으로 측정한 이벤트 루프 지연', lambda: [
+    ({}, bot_status['loop_lag_ms'] / 1000)
+])
+
+# 임시 채널 사용 통계 - 미리 할당한 배열만 갱신해 이벤트마다 객체를 만들지 않음
+ANALYTICS_HOURS = int(os.environ.get('ANALYTICS_HOURS', 168))  # 시간별 링 버퍼 길이 (기본 1주)
+LIFETIME_BUCKETS = (10, 30, 60, 120, 300, 600, 1800, 3600, 7200, 14400, 43200, 86400)
+ANALYTICS_MAX_LIMIT = 99  # 음성 채널 인원 제한 최대값
+ANALYTICS_TOKEN = os.environ.get('ANALYTICS_TOKEN')  # /analytics, /metrics 접근 토큰 (없으면 로컬 요청만 허용)
+
+class OccupancyAnalytics:
+    """길드 하나의 생성/입장/퇴장/삭제 이벤트를 고정 크기 집계로 누적 (메모리는 시간 칸 수에만 비례)
+
+    시간별 칸은 해당 시간이 처음 기록될 때 0으로 초기화. 사람이 남은 채로 삭제된 채널은
+    퇴장 이벤트가 레지스트리 밖에서 오므로, 인원은 시간이 바뀔 때와 조회할 때 캐시에서 다시 셈.
+    """
+
+    SERIES = ('created', 'deleted', 'unused', 'joins', 'peak_channels', 'peak_occupants')
+
+    def __init__(self, guild_id, hours):
+        self.guild_id = guild_id
+        self.hours = hours
+        self.slot_hour = [-1] * hours                       # 칸마다 기록 중인 epoch 시간
+        self.series = {name: [0] * hours for name in self.SERIES}
+        self.created = self.series['created']
+        self.deleted = self.series['deleted']
+        self.unused = self.series['unused']
+        self.joins = self.series['joins']
+        self.peak_channels = self.series['peak_channels']
+        self.peak_occupants = self.series['peak_occupants']
+        self.created_by_limit = [0] * (ANALYTICS_MAX_LIMIT + 1)
+        self.unused_by_limit = [0] * (ANALYTICS_MAX_LIMIT + 1)
+        self.lifetime = {used: Histogram(LIFETIME_BUCKETS) for used in (True, False)}
+        self.occupants = 0        # 이 길드 임시 채널에 있는 인원
+        self.max_channels = 0
+        self.max_occupants = 0
+        self.since = datetime.now()
+        self._hour = -1
+        self._index = 0
+
+    def _slot(self, now):
+        hour = int(now // 3600)
+        if hour != self._hour:
+            self._rollover(hour)
+        return self._index
+
+    def _rollover(self, hour):
+        index = hour % self.hours
+        if self.slot_hour[index] != hour:
+            for column in self.series.values():
+                column[index] = 0
+            self.slot_hour[index] = hour
+            self.occupants = self.count_occupants()
+            self.peak_channels[index] = self.channel_count()
+            self.peak_occupants[index] = self.occupants
+            self.max_channels = max(self.max_channels, self.peak_channels[index])
+            self.max_occupants = max(self.max_occupants, self.occupants)
+        self._hour = hour
+        self._index = index
+
+    def channel_count(self):
+        return channel_registry.user_count_by_guild.get(self.guild_id, 0)
+
+    def count_occupants(self):
+        total = 0
+        for record in channel_registry.for_guild(self.guild_id):
+            channel = channel_registry.channel(record)
+            if channel is not None:
+                total += len(channel.members)
+        return total
+
+    def on_create(self, record):
+        index = self._slot(time.time())
+        self.created[index] += 1
+        self.created_by_limit[min(record.limit, ANALYTICS_MAX_LIMIT)] += 1
+        channels = self.channel_count()
+        if channels > self.peak_channels[index]:
+            self.peak_channels[index] = channels
+            if channels > self.max_channels:
+                self.max_channels = channels
+
+    def on_join(self):
+        # 시간이 바뀌면 _slot()이 인원을 다시 세므로 (입장한 사람 포함) 먼저 더함
+        self.occupants += 1
+        index = self._slot(time.time())
+        self.joins[index] += 1
+        if self.occupants > self.peak_occupants[index]:
+            self.peak_occupants[index] = self.occupants
+            if self.occupants > self.max_occupants:
+                self.max_occupants = self.occupants
+
+    def on_leave(self):
+        if self.occupants:
+            self.occupants -= 1
+
+    def recount(self):
+        """인원을 캐시에서 다시 세고 이번 시간 최대값에 반영 (사람과 함께 삭제된 채널의 오차 보정)"""
+        self.occupants = self.count_occupants()
+        index = self._slot(time.time())
+        if self.occupants > self.peak_occupants[index]:
+            self.peak_occupants[index] = self.occupants
+            if self.occupants > self.max_occupants:
+                self.max_occupants = self.occupants
+
+    def on_delete(self, record, lifetime):
+        index = self._slot(time.time())
+        self.deleted[index] += 1
+        self.lifetime[record.has_been_used].observe(lifetime)
+        if not record.has_been_used:
+            self.unused[index] += 1
+            self.unused_by_limit[min(record.limit, ANALYTICS_MAX_LIMIT)] += 1
+
+    @staticmethod
+    def _lifetime_stats(histogram):
+        p50, p90, p99 = (histogram.quantile(q) for q in (0.5, 0.9, 0.99))
+        return {
+            'count': histogram.count,
+            'mean_s': round(histogram.sum / histogram.count, 1) if histogram.count else None,
+            'p50_s': p50, 'p90_s': p90, 'p99_s': p99
+        }
+
+    def totals(self):
+        self.recount()
+        created = sum(self.created_by_limit)
+        unused = sum(self.unused_by_limit)
+        deleted = self.lifetime[True].count + self.lifetime[False].count
+        return {
+            'created': created,
+            'deleted': deleted,
+            'unused': unused,
+            'unused_ratio': round(unused / deleted, 3) if deleted else None,
+            'current_channels': self.channel_count(),
+            'current_occupants': self.occupants,
+            'peak_channels': self.max_channels,
+            'peak_occupants': self.max_occupants
+        }
+
+    def snapshot(self, hours=24):
+        """최근 hours시간의 시계열과 누적 집계 (조회 시점에만 객체 생성)"""
+        current = int(time.time() // 3600)
+        totals = self.totals()
+        hourly = []
+        for hour in range(current - min(hours, self.hours) + 1, current + 1):
+            index = hour % self.hours
+            if self.slot_hour[index] != hour:
+                continue
+            row = {'hour': datetime.fromtimestamp(hour * 3600).isoformat()}
+            for name, column in self.series.items():
+                row[name] = column[index]
+            hourly.append(row)
+
+        # 링 버퍼 전체에서 시간대(0~23시)별 최대 동시 채널 수
+        peak_by_hour_of_day = [0] * 24
+        for index, hour in enumerate(self.slot_hour):
+            if hour >= 0:
+                hour_of_day = datetime.fromtimestamp(hour * 3600).hour
+                peak_by_hour_of_day[hour_of_day] = max(peak_by_hour_of_day[hour_of_day], self.peak_channels[index])
+
+        return {
+            'guild_id': self.guild_id,
+            'since': self.since.isoformat(),
+            'totals': totals,
+            'lifetime': {
+                'used': self._lifetime_stats(self.lifetime[True]),
+                'unused': self._lifetime_stats(self.lifetime[False])
+            },
+            'by_limit': {
+                limit: {'created': count, 'unused': self.unused_by_limit[limit]}
+                for limit, count in enumerate(self.created_by_limit) if count
+            },
+            'peak_by_hour_of_day': peak_by_hour_of_day,
+            'hourly': hourly
+        }
+
+class AnalyticsStore:
+    """길드별 OccupancyAnalytics 보관소 - 길드의 첫 이벤트 때 한 번만 배열을 할당
+
+    다른 길드의 사용량이 보이지 않도록 집계는 길드별로만 나누고,
+    Prometheus 수명 히스토그램만 봇 전체 기준으로 둠 (길드 ID를 레이블로 쓰지 않음).
+    """
+
+    def __init__(self, hours):
+        self.hours = hours
+        self.guilds = {}  # guild_id -> OccupancyAnalytics
+        self.lifetime = {
+            used: metrics.histogram('voicebot_channel_lifetime_seconds', '임시 채널 생성부터 삭제까지 걸린 시간',
+                                    {'used': 'true' if used else 'false'}, bounds=LIFETIME_BUCKETS)
+            for used in (True, False)
+        }
+
+    def for_guild(self, guild_id):
+        stats = self.guilds.get(guild_id)
+        if stats is None:
+            stats = self.guilds[guild_id] = OccupancyAnalytics(guild_id, self.hours)
+        return stats
+
+    def on_create(self, record):
+        if not record.auto_created:
+            self.for_guild(record.guild_id).on_create(record)
+
+    def on_join(self, guild_id):
+        self.for_guild(guild_id).on_join()
+
+    def on_leave(self, guild_id):
+        stats = self.guilds.get(guild_id)
+        if stats is not None:
+            stats.on_leave()
+
+    def on_delete(self, record):
+        if record.auto_created:
+            return
+        lifetime = time.time() - record.created_at
+        self.lifetime[record.has_been_used].observe(lifetime)
+        self.for_guild(record.guild_id).on_delete(record, lifetime)
+
+    def recount(self, guild_id=None):
+        """길드 하나(또는 전체)의 인원을 다시 셈 - 상태 복구 뒤 호출"""
+        if guild_id is None:
+            targets = list(self.guilds.values())
+        else:
+            targets = [self.guilds[guild_id]] if guild_id in self.guilds else []
+        for stats in targets:
+            stats.recount()
+
+    def forget(self, guild_id):
+        """봇이 나간 길드의 집계 제거"""
+        self.guilds.pop(guild_id, None)
+
+    def snapshot(self, guild_id, hours=24):
+        """길드 하나의 통계 - 기록이 없으면 None"""
+        stats = self.guilds.get(guild_id)
+        return stats.snapshot(hours) if stats is not None else None
+
+    def overview(self):
+        """봇 전체 합계와 길드별 누적 집계 (운영용 /analytics)"""
+        guilds = {guild_id: stats.totals() for guild_id, stats in self.guilds.items()}
+        totals = {key: sum(row[key] for row in guilds.values())
+                  for key in ('created', 'deleted', 'unused', 'current_occupants')}
+        totals['current_channels'] = channel_registry.user_count
+        return {'totals': totals, 'guilds': guilds}
+
+analytics = AnalyticsStore(ANALYTICS_HOURS)
+
+# 채널 생성 입장 제어 - REST 호출 전에 메모리에서만 판단
+ADMISSION_USER_CONCURRENCY = int(os.environ.get('ADMISSION_USER_CONCURRENCY', 1))   # 사용자당 동시 생성 요청
+ADMISSION_USER_CHANNELS = int(os.environ.get('ADMISSION_USER_CHANNELS', 3))         # 사용자당 보유 채널 (길드별)
+ADMISSION_USER_RATE = float(os.environ.get('ADMISSION_USER_RATE', 6))              # 사용자당 분당 생성 수
+ADMISSION_USER_BURST = int(os.environ.get('ADMISSION_USER_BURST', 3))
+ADMISSION_GUILD_CHANNELS = int(os.environ.get('ADMISSION_GUILD_CHANNELS', 100))     # 길드당 임시 채널 수
+ADMISSION_GUILD_INFLIGHT = int(os.environ.get('ADMISSION_GUILD_INFLIGHT', 20))      # 길드당 동시 생성 요청 (넘으면 순서대로 대기)
+CLICK_DEDUP_WINDOW = float(os.environ.get('CLICK_DEDUP_WINDOW', 3.0))             # 같은 버튼 연타를 합치는 구간 (초)
+
+class Admission:
+    """입장 허가 - 생성이 끝나면 finish()로 결과를 알려줘야 함"""
+    __slots__ = ('key', 'future', 'running')
+
+    def __init__(self, key):
+        self.key = key
+        self.future = asyncio.get_running_loop().create_future()
+        self.running = False  # 길드 동시 생성 슬롯을 잡고 있는지
+
+class AdmissionController:
+    """사용자/길드별 동시 요청·보유 채널·생성 속도 제한과 연타 중복 제거
+
+    길드 동시 생성 한도는 거절하지 않고 허가된 요청을 순서대로 기다리게 함 - 중복 클릭과
+    한도를 넘은 사용자만 거절. 대기 중인 요청도 길드 채널 한도에 포함되므로 대기열 길이는
+    ADMISSION_GUILD_CHANNELS를 넘지 않음.
+    """
+
+    OUTCOMES = ('admitted', 'duplicate', 'user_busy', 'user_quota', 'rate_limited', 'guild_quota')
+
+    def __init__(self):
+        self.user_inflight = {}    # (guild_id, user_id) -> 진행 중인 요청 수
+        self.guild_inflight = {}   # guild_id -> 허가된 요청 수 (생성 중 + 대기 중)
+        self.guild_running = {}    # guild_id -> 생성 중인 요청 수 (ADMISSION_GUILD_INFLIGHT 이하)
+        self.guild_waiters = {}    # guild_id -> deque[Future] (슬롯을 기다리는 요청)
+        self.user_buckets = {}     # (guild_id, user_id) -> TokenBucket
+        self.recent = {}           # (guild_id, user_id, limit) -> (만료 시각, Future[channel_id])
+        self.recent_order = deque()
+        self.counters = {
+            outcome: metrics.counter('voicebot_admission', '채널 생성 입장 제어 결과', {'outcome': outcome})
+            for outcome in self.OUTCOMES
+        }
+        self.queued = metrics.counter('voicebot_admission_queued', '길드 동시 생성 한도로 순서를 기다린 요청')
+
+    def _expire_recent(self, now):
+        while self.recent_order and self.recent_order[0][0] <= now:
+            expires, key = self.recent_order.popleft()
+            entry = self.recent.get(key)
+            if entry is not None and entry[0] == expires and entry[1].done():
+                del self.recent[key]
 
-# 웹 서버를 별도 스레드에서 실행
-web_thread = Thread(target=run_web, daemon=True)
-web_thread.start()
-logger.info("🌐 웹 서버 시작됨")
+    def duplicate_of(self, guild_id, user_id, limit):
+        """구간 안에 같은 버튼을 누른 요청이 있으면 그 Future (진행 중이거나 성공한 것만)"""
+        now = time.monotonic()
+        self._expire_recent(now)
+        entry = self.recent.get((guild_id, user_id, limit))
+        if entry is None:
+            return None
+        future = entry[1]
+        if future.done() and (entry[0] <= now or future.result() is None):
+            return None
+        return future
 
-# Discord 봇 부분
-import discord
-from discord.ext import commands, tasks
-from datetime import timedelta
+    def check(self, guild_id, user_id, limit):
+        """(결과, 허가 또는 거절 사유 정보) 반환 - 결과가 'admitted'일 때만 생성 진행"""
+        duplicate = self.duplicate_of(guild_id, user_id, limit)
+        if duplicate is not None:
+            return self._count('duplicate'), duplicate
 
-# 봇 설정
-intents = discord.Intents.default()
-intents.message_content = True
-intents.voice_states = True
-intents.guilds = True
+        user_key = (guild_id, user_id)
+        if self.user_inflight.get(user_key, 0) >= ADMISSION_USER_CONCURRENCY:
+            return self._count('user_busy'), None
+        owned = sum(1 for record in channel_registry.for_creator(user_id) if record.guild_id == guild_id)
+        if owned >= ADMISSION_USER_CHANNELS:
+            return self._count('user_quota'), owned
+        if len(channel_registry.by_guild.get(guild_id, ())) + self.guild_inflight.get(guild_id, 0) >= ADMISSION_GUILD_CHANNELS:
+            return self._count('guild_quota'), None
 
-bot = commands.Bot(command_prefix='!', intents=intents)
+        bucket = self.user_buckets.get(user_key)
+        if bucket is None:
+            if len(self.user_buckets) > 10000:
+                self._prune_buckets()
+            bucket = self.user_buckets[user_key] = TokenBucket(ADMISSION_USER_RATE / 60, ADMISSION_USER_BURST)
+        retry_after = bucket.wait_time()
+        if retry_after > 0:
+            return self._count('rate_limited'), retry_after
+        bucket.consume()
 
-# 생성된 채널들을 추적하기 위한 딕셔너리
-created_channels = {}
-channel_timers = {}
+        admission = Admission((guild_id, user_id, limit))
+        expires = time.monotonic() + CLICK_DEDUP_WINDOW
+        self.recent[admission.key] = (expires, admission.future)
+        self.recent_order.append((expires, admission.key))
+        self.user_inflight[user_key] = self.user_inflight.get(user_key, 0) + 1
+        self.guild_inflight[guild_id] = self.guild_inflight.get(guild_id, 0) + 1
+        return self._count('admitted'), admission
 
-async def delete_channel_after_delay(channel_id, delay=30):
-    """지정된 시간 후 채널 삭제"""
-    try:
-        await asyncio.sleep(delay)
-        
-        if channel_id in created_channels:
-            channel_info = created_channels[channel_id]
-            channel = channel_info['channel']
-            
-            # 자동 생성된 채널은 건드리지 않음
-            if channel_info.get('auto_created'):
-                return
-            
-            # 채널이 여전히 비어있는지 확인
-            if len(channel.members) == 0:
-                await channel.delete()
-                logger.info(f"⏰ 30초 타이머로 채널 삭제됨: {channel.name}")
-                
-                # 딕셔너리에서 제거
-                if channel_id in created_channels:
-                    del created_channels[channel_id]
-                if channel_id in channel_timers:
-                    del channel_timers[channel_id]
+    async def wait_turn(self, admission):
+        """길드 동시 생성 슬롯을 얻을 때까지 대기 (먼저 허가된 요청부터)"""
+        guild_id = admission.key[0]
+        waiters = self.guild_waiters.get(guild_id)
+        if not waiters and self.guild_running.get(guild_id, 0) < ADMISSION_GUILD_INFLIGHT:
+            self.guild_running[guild_id] = self.guild_running.get(guild_id, 0) + 1
+            admission.running = True
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self.guild_waiters.setdefault(guild_id, deque()).append(waiter)
+        self.queued.inc()
+        try:
+            await waiter
+        finally:
+            # 슬롯을 넘겨받은 뒤 취소됐어도 finish()가 반납하도록 표시
+            if waiter.done() and not waiter.cancelled():
+                admission.running = True
             else:
-                # 채널에 사람이 있으면 타이머 제거
-                if channel_id in channel_timers:
-                    del channel_timers[channel_id]
-                    
-    except discord.NotFound:
-        # 채널이 이미 삭제된 경우
-        if channel_id in created_channels:
-            del created_channels[channel_id]
-        if channel_id in channel_timers:
-            del channel_timers[channel_id]
-    except Exception as e:
-        logger.error(f"❌ 타이머 채널 삭제 오류: {e}")
+                waiter.cancel()
+
+    def _release_slot(self, guild_id):
+        """끝난 요청의 슬롯을 다음 대기 요청에 넘기거나 반납"""
+        waiters = self.guild_waiters.get(guild_id)
+        while waiters:
+            waiter = waiters.popleft()
+            if not waiter.done():
+                if not waiters:
+                    del self.guild_waiters[guild_id]
+                waiter.set_result(None)
+                return
+        self.guild_waiters.pop(guild_id, None)
+        self.guild_running[guild_id] -= 1
+        if not self.guild_running[guild_id]:
+            del self.guild_running[guild_id]
+
+    def finish(self, admission, channel_id=None):
+        """생성 완료(channel_id) 또는 실패(None) - 실패한 요청은 중복으로 취급하지 않음"""
+        guild_id, user_id, _ = admission.key
+        for counts, key in ((self.user_inflight, (guild_id, user_id)), (self.guild_inflight, guild_id)):
+            counts[key] -= 1
+            if not counts[key]:
+                del counts[key]
+        if admission.running:
+            admission.running = False
+            self._release_slot(guild_id)
+        if not admission.future.done():
+            admission.future.set_result(channel_id)
+        # 구간이 이미 지났으면 만료 큐가 지나간 뒤라 여기서 정리
+        entry = self.recent.get(admission.key)
+        if entry is not None and entry[1] is admission.future and entry[0] <= time.monotonic():
+            del self.recent[admission.key]
+
+    def _prune_buckets(self):
+        """다시 가득 찬 버킷은 새로 만든 것과 같으므로 제거"""
+        for key, bucket in list(self.user_buckets.items()):
+            bucket.wait_time()
+            if bucket.tokens >= bucket.capacity:
+                del self.user_buckets[key]
+
+    def _count(self, outcome):
+        self.counters[outcome].inc()
+        return outcome
+
+    def stats(self):
+        return {**{outcome: counter.value for outcome, counter in self.counters.items()}, 'queued': self.queued.value}
+
+admission_control = AdmissionController()
+
+ADMISSION_MESSAGES = {
+    'user_busy': "이전 통화방 생성 요청을 처리하고 있습니다. 잠시만 기다려주세요.",
+    'guild_quota': f"이 서버의 임시 통화방이 최대 개수({ADMISSION_GUILD_CHANNELS}개)에 도달했습니다.",
+    'retired_button': "이 서버에서 더 이상 쓰지 않는 버튼입니다. 관리자에게 `/패널`을 다시 보내달라고 요청해주세요."
+}
+
+LIMIT_EMOJIS = {1: '1️⃣', 2: '2️⃣', 3: '3️⃣', 4: '4️⃣', 5: '5️⃣', 6: '6️⃣', 7: '7️⃣', 8: '8️⃣', 9: '9️⃣', 10: '🔟'}
+
+class VoiceChannelButton(discord.ui.DynamicItem[discord.ui.Button], template=r'voice_(?P<limit>[0-9]+)'):
+    """'voice_N' 버튼 - custom_id로 인원을 알아내므로 어떤 버튼 구성의 패널이든 재시작 후에도 동작"""
+
+    def __init__(self, limit):
+        super().__init__(discord.ui.Button(
+            label=f'{limit}인', style=discord.ButtonStyle.secondary,
+            emoji=LIMIT_EMOJIS.get(limit), custom_id=f'voice_{limit}'
+        ))
+        self.limit = limit
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(int(match['limit']))
+
+    async def callback(self, interaction: discord.Interaction):
+        # 설정에서 빠진 인원의 버튼이 예전 패널에 남아 있을 수 있음
+        if self.limit not in guild_config.get(interaction.guild_id).limits:
+            await VoiceChannelView.reject(interaction, 'retired_button', None)
+            return
+        await VoiceChannelView.create_voice_channel(interaction, self.limit)
 
 class VoiceChannelView(discord.ui.View):
-    def __init__(self):
+    """길드 설정의 인원 목록으로 버튼을 만드는 생성 패널"""
+
+    def __init__(self, limits=None):
         super().__init__(timeout=None)
+        for limit in limits or guild_config.defaults.limits:
+            self.add_item(VoiceChannelButton(limit))
     
-    @discord.ui.button(label='1인', style=discord.ButtonStyle.secondary, emoji='1️⃣', custom_id='voice_1')
-    async def one_person(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.create_voice_channel(interaction, 1)
-    
-    @discord.ui.button(label='2인', style=discord.ButtonStyle.secondary, emoji='2️⃣', custom_id='voice_2')
-    async def two_person(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.create_voice_channel(interaction, 2)
-    
-    @discord.ui.button(label='3인', style=discord.ButtonStyle.secondary, emoji='3️⃣', custom_id='voice_3')
-    async def three_person(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.create_voice_channel(interaction, 3)
-    
-    @discord.ui.button(label='4인', style=discord.ButtonStyle.secondary, emoji='4️⃣', custom_id='voice_4')
-    async def four_person(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.create_voice_channel(interaction, 4)
-    
-    @discord.ui.button(label='5인', style=discord.ButtonStyle.secondary, emoji='5️⃣', custom_id='voice_5')
-    async def five_person(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.create_voice_channel(interaction, 5)
+    @staticmethod
+    async def reject(interaction, outcome, detail):
+        """입장 거절 - REST 호출 없이 바로 ephemeral 응답"""
+        title = "🚫 생성 제한"
+        if outcome == 'duplicate':
+            title = "⏳ 이미 처리 중"
+            if detail.done():
+                description = f"방금 만든 통화방이 있습니다: <#{detail.result()}>"
+            else:
+                description = "같은 통화방을 만들고 있습니다. 잠시만 기다려주세요."
+        elif outcome == 'user_quota':
+            description = (f"통화방은 1인당 최대 {ADMISSION_USER_CHANNELS}개까지 만들 수 있습니다. "
+                           f"(현재 {detail}개)\n`/내채널삭제`로 정리한 뒤 다시 시도해주세요.")
+        elif outcome == 'rate_limited':
+            description = f"너무 자주 생성하고 있습니다. {math.ceil(detail)}초 후 다시 시도해주세요."
+        else:
+            description = ADMISSION_MESSAGES[outcome]
+
+        embed = discord.Embed(title=title, description=description, color=0xffaa00)
+        try:
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+        except discord.HTTPException:
+            pass  # 인터랙션 만료
     
-    async def create_voice_channel(self, interaction: discord.Interaction, limit: int):
+    @staticmethod
+    async def create_voice_channel(interaction: discord.Interaction, limit: int):
+        started = time.perf_counter()
+        # 입장 제어 - 거절되면 REST 호출 없이 바로 응답
+        outcome, admission = admission_control.check(interaction.guild_id, interaction.user.id, limit)
+        if outcome != 'admitted':
+            await VoiceChannelView.reject(interaction, outcome, admission)
+            return
+        
+        voice_channel = None
         try:
-            guild = interaction.guild
-            user = interaction.user
+            # 3초 응답 제한을 넘지 않도록 먼저 defer
+            await interaction.response.defer(ephemeral=True, thinking=True)
+            click_latency.record('defer', time.perf_counter() - started)
             
-            # 카테고리 찾기 (없으면 생성)
-            category = discord.utils.get(guild.categories, name="🔊 임시 통화방")
-            if not category:
-                category = await guild.create_category("🔊 임시 통화방")
+            # 길드 동시 생성 한도를 넘었으면 거절 대신 순서를 기다림 (defer 뒤라 3초 제한과 무관)
+            stage_started = time.perf_counter()
+            await admission_control.wait_turn(admission)
+            click_latency.record('queue', time.perf_counter() - stage_started)
             
-            # 채널 이름 생성
-            base_name = f"{limit}인방"
-            channel_name = base_name
+            guild = interaction.guild
+            user = interaction.user
             
-            # 동일한 이름의 채널이 있는지 확인하고 번호 추가
-            existing_names = [ch.name for ch in guild.voice_channels if ch.category == category]
-            counter = 1
+            # 카테고리 찾기 (없으면 생성, 동시 클릭 시 한 번만 생성)
+            stage_started = time.perf_counter()
+            category = await channel_slots.resolve_category(guild)
+            click_latency.record('category', time.perf_counter() - stage_started)
             
-            while channel_name in existing_names:
-                counter += 1
-                channel_name = f"{base_name} #{counter}"
+            # 채널 이름 생성 (가장 작은 빈 번호 예약)
+            channel_name, slot = channel_slots.acquire(category, limit)
             
-            # 음성 채널 생성
-            voice_channel = await guild.create_voice_channel(
-                name=channel_name,
-                category=category,
-                user_limit=limit
-            )
+            # 생성자 관리 권한을 생성 요청에 함께 포함 (카테고리 권한은 유지)
+            overwrites = dict(category.overwrites)
+            overwrites[user] = discord.PermissionOverwrite(manage_channels=True, move_members=True)
             
-            # 채널 권한 설정 (생성자에게 관리 권한)
-            await voice_channel.set_permissions(user, manage_channels=True, move_members=True)
+            stage_started = time.perf_counter()
+            try:
+                # 풀 모드면 대기 채널을 꺼내 한 번의 edit로 설정
+                voice_channel = await channel_pool.claim(guild, channel_name, limit, overwrites)
+                
+                if voice_channel is None:
+                    # 음성 채널 생성 (REST 1회)
+                    voice_channel = await rest_scheduler.submit(
+                        'create_channel', guild.id, PRIORITY_CLICK,
+                        lambda: guild.create_voice_channel(
+                            name=channel_name,
+                            category=category,
+                            user_limit=limit,
+                            overwrites=overwrites
+                        )
+                    )
+            except Exception:
+                channel_slots.cancel(slot)
+                raise
+            channel_slots.bind(voice_channel.id, slot)
+            click_latency.record('create', time.perf_counter() - stage_started)
             
             # 생성된 채널 추적
-            created_channels[voice_channel.id] = {
-                'channel': voice_channel,
-                'creator': user.id,
-                'created_at': datetime.now(),
-                'limit': limit,
-                'has_been_used': False,
-                'auto_created': False  # 수동 생성
-            }
-            
-            # 사용자를 채널로 이동 (음성 채널에 있을 때만)
-            if user.voice and user.voice.channel:
-                try:
-                    await user.move_to(voice_channel)
-                    created_channels[voice_channel.id]['has_been_used'] = True
-                except:
-                    pass
-            else:
-                # 사용자가 음성 채널에 없으면 30초 타이머 시작
-                task = asyncio.create_task(delete_channel_after_delay(voice_channel.id))
-                channel_timers[voice_channel.id] = task
+            track_channel(ChannelRecord(voice_channel.id, guild.id, user.id, limit), voice_channel)
             
             embed = discord.Embed(
                 title="🎉 통화방 생성 완료!",
                 description=f"**{channel_name}** 이 생성되었습니다.\n"
                            f"📊 최대 인원: **{limit}명**\n"
-                           f"⏰ 30초간 비어있으면 자동 삭제됩니다.\n"
+                           f"⏰ {guild_config.get(guild.id).empty_timeout}초간 비어있으면 자동 삭제됩니다.\n"
                            f"🔗 채널: <#{voice_channel.id}>",
                 color=0x00ff88
             )
             
-            await interaction.response.send_message(embed=embed, ephemeral=True)
-            logger.info(f"✅ 채널 생성됨: {channel_name} by {user.display_name}")
+            async def confirm():
+                stage_started = time.perf_counter()
+                await interaction.followup.send(embed=embed, ephemeral=True)
+                click_latency.record('confirm', time.perf_counter() - stage_started)
+                click_latency.record('total', time.perf_counter() - started)
+            
+            async def move():
+                stage_started = time.perf_counter()
+                try:
+                    await rest_scheduler.submit(
+                        'move_member', guild.id, PRIORITY_MOVE, lambda: user.move_to(voice_channel)
+                    )
+                    mark_channel_used(voice_channel.id)
+                except Exception:
+                    # 이동 실패 시 빈 채널로 보고 타이머 시작
+                    arm_empty_timer(voice_channel.id)
+                click_latency.record('move', time.perf_counter() - stage_started)
+            
+            # 사용자를 채널로 이동 (음성 채널에 있을 때만) - 확인 메시지와 동시에 처리
+            if user.voice and user.voice.channel:
+                await asyncio.gather(confirm(), move())
+            else:
+                # 사용자가 음성 채널에 없으면 타이머 시작
+                arm_empty_timer(voice_channel.id)
+                await confirm()
+            
+            logger.info("✅ 채널 생성됨: %s by %s", channel_name, user.display_name, extra={
+                'event': 'channel_create', 'guild': guild.id, 'channel': voice_channel.id, 'user': user.id,
+                'latency_ms': round((time.perf_counter() - started) * 1000, 1)
+            })
             
         except Exception as e:
             error_embed = discord.Embed(
@@ -336,92 +2868,289 @@ class VoiceChannelView(discord.ui.View):
                 description=f"오류가 발생했습니다: {str(e)}\n관리자에게 문의해주세요.",
                 color=0xff0000
             )
-            await interaction.response.send_message(embed=error_embed, ephemeral=True)
-            logger.error(f"❌ 채널 생성 오류: {e}")
+            logger.error("❌ 채널 생성 오류: %s", e, extra={
+                'event': 'channel_create_error', 'guild': interaction.guild_id, 'user': interaction.user.id,
+                'latency_ms': round((time.perf_counter() - started) * 1000, 1)
+            })
+            try:
+                if interaction.response.is_done():
+                    await interaction.followup.send(embed=error_embed, ephemeral=True)
+                else:
+                    await interaction.response.send_message(embed=error_embed, ephemeral=True)
+            except discord.HTTPException:
+                pass  # 인터랙션 만료
+        finally:
+            admission_control.finish(admission, voice_channel.id if voice_channel is not None else None)
+
+# 백그라운드 서비스 수명 주기 - 재연결로 on_ready가 다시 와도 한 번만 시작
+SERVICE_BACKOFF_MAX = 60
+
+class Lifecycle:
+    """백그라운드 서비스를 한 번만 시작하고 오류로 끝나면 백오프 후 다시 시작"""
+
+    def __init__(self):
+        self.services = {}   # 이름 -> 코루틴 팩토리
+        self.tasks = {}
+        self.restarts = {}
+        self.started = False
+        self.ready_count = 0
+
+    def service(self, name, factory):
+        self.services[name] = factory
+        self.restarts[name] = 0
+
+    def start(self):
+        if self.started:
+            return
+        self.started = True
+        for name in self.services:
+            self.tasks[name] = asyncio.create_task(self._supervise(name))
+        logger.info(f"🧩 백그라운드 서비스 {len(self.services)}개 시작: {', '.join(self.services)}")
+
+    async def _supervise(self, name):
+        backoff = 1
+        while True:
+            started = time.monotonic()
+            try:
+                await self.services[name]()
+                logger.info(f"🛑 서비스 종료: {name}")
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # 오래 버틴 서비스는 백오프 초기화
+                if time.monotonic() - started > SERVICE_BACKOFF_MAX:
+                    backoff = 1
+                self.restarts[name] += 1
+                logger.error(f"🚨 서비스 {name} 오류: {e}, {backoff}초 후 재시작")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, SERVICE_BACKOFF_MAX)
+
+    def stats(self):
+        return {
+            name: {'running': name in self.tasks and not self.tasks[name].done(), 'restarts': self.restarts[name]}
+            for name in self.services
+        }
+
+lifecycle = Lifecycle()
+lifecycle.service('timer_wheel', expiry_timers.run)
+lifecycle.service('self_ping', liveness.self_ping_loop)
+lifecycle.service('loop_lag', liveness.loop_lag_loop)
+lifecycle.service('orphan_sweeper', orphan_sweeper.run)
+lifecycle.service('guild_config', guild_config.run)
+if lease is not None:
+    lifecycle.service('lease_watch', watch_lease)
+if AUTO_CHANNEL_KEEPER:
+    lifecycle.service('auto_channel_keeper', auto_channel_keeper)
+
+# 슬래시 명령어 정의가 바뀌었을 때만 동기화 (정의 해시를 디스크에 저장)
+COMMAND_SYNC_CACHE = os.environ.get('COMMAND_SYNC_CACHE', 'command_sync.json')
+
+def command_fingerprint():
+    """명령어 정의 + 애플리케이션 ID의 해시 (토큰이 바뀌어도 다시 동기화)"""
+    definitions = sorted((command.to_dict(bot.tree) for command in bot.tree.get_commands()), key=lambda d: d['name'])
+    payload = json.dumps({'application_id': bot.application_id, 'commands': definitions}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+async def sync_commands():
+    fingerprint = command_fingerprint()
+    try:
+        with open(COMMAND_SYNC_CACHE, encoding='utf-8') as f:
+            cached = json.load(f).get('fingerprint')
+    except (OSError, ValueError):
+        cached = None
+
+    if cached == fingerprint:
+        logger.info("⚡ 슬래시 명령어 정의가 그대로라 동기화를 건너뜁니다.")
+        return
+
+    try:
+        synced = await bot.tree.sync()
+        logger.info(f'⚡ {len(synced)}개의 슬래시 명령어가 동기화되었습니다.')
+    except Exception as e:
+        logger.error(f'❌ 명령어 동기화 실패: {e}')
+        return
+
+    try:
+        with open(COMMAND_SYNC_CACHE, 'w', encoding='utf-8') as f:
+            json.dump({'fingerprint': fingerprint, 'synced_at': datetime.now().isoformat()}, f)
+    except OSError as e:
+        logger.warning(f"⚠️ 명령어 동기화 해시 저장 실패: {e}")
+
+async def prepare_state():
+    """게이트웨이 연결과 동시에 디스크 상태(설정 DB, 채널 저널)를 스레드에서 읽음"""
+    with startup.phase('prepare'):
+        await asyncio.gather(asyncio.to_thread(guild_config.open), asyncio.to_thread(channel_journal.follow))
+
+state_prepared = None  # setup_hook에서 시작하는 prepare_state() Task
+
+async def restore_state():
+    """저널 복구 후 채널 풀 준비 - 끝나면 상태가 일관된 것으로 보고 준비 완료"""
+    if not channel_journal.restored:
+        with startup.phase('restore'):
+            await restore_channels()
+    startup.mark('consistent')
+    startup.summarize()
+    status_snapshot.invalidate()
+    
+    # 채널 풀 모드면 길드별 대기 채널 미리 생성
+    if channel_pool.enabled:
+        for guild in bot.guilds:
+            channel_pool.schedule_refill(guild)
+
+async def sync_commands_once():
+    # 전역 명령어 동기화는 클러스터에서 첫 워커만 수행
+    if CLUSTER_ID in (None, '0'):
+        with startup.phase('command_sync'):
+            await sync_commands()
+
+@bot.event
+async def setup_hook():
+    """로그인 직후 한 번 - 게이트웨이 연결과 무관한 서비스 시작"""
+    global state_prepared
+    state_prepared = asyncio.create_task(prepare_state())
+    bot.add_dynamic_items(VoiceChannelButton)
+    lifecycle.start()
 
 @bot.event
 async def on_ready():
-    logger.info(f'🤖 {bot.user}가 로그인했습니다!')
-    bot.add_view(VoiceChannelView())
+    lifecycle.ready_count += 1
     
     # 봇 상태 업데이트
     bot_status['bot_ready'] = True
+    status_snapshot.invalidate()
     
-    # Keep-alive 작업 시작
-    asyncio.create_task(keep_alive())
-    logger.info("🔄 Keep-alive 작업이 시작되었습니다.")
+    # 재연결 후에는 시작 작업을 다시 하지 않음
+    if lifecycle.ready_count > 1:
+        logger.info(f'🔁 게이트웨이 재연결 후 준비 완료 ({lifecycle.ready_count}번째)')
+        return
     
-    # 자동 채널 생성으로 봇 활성 상태 유지
-    asyncio.create_task(auto_channel_keeper())
-    logger.info("🤖 자동 채널 생성 Keep-Alive 시작되었습니다.")
+    startup.mark('gateway_ready')
+    logger.info(f'🤖 {bot.user}가 로그인했습니다!')
     
-    try:
-        synced = await bot.tree.sync()
-        logger.info(f'⚡ {len(synced)}개의 슬래시 명령어가 동기화되었습니다.')
-    except Exception as e:
-        logger.error(f'❌ 명령어 동기화 실패: {e}')
+    # 상태 복구와 명령어 동기화(REST)는 서로 무관하므로 동시에 진행
+    await state_prepared
+    await asyncio.gather(restore_state(), sync_commands_once())
+
+@bot.event
+async def on_disconnect():
+    # 재연결될 때까지 /readyz는 503
+    if bot_status['bot_ready']:
+        bot_status['bot_ready'] = False
+        status_snapshot.invalidate()
 
 @bot.event
+async def on_resumed():
+    bot_status['bot_ready'] = True
+    status_snapshot.invalidate()
+
+@bot.event
+@observe_duration(voice_state_histogram)
 async def on_voice_state_update(member, before, after):
     """음성 채널 상태 변경 감지"""
     
     # 사용자가 임시 통화방에 들어왔을 때
-    if after.channel and after.channel.id in created_channels:
-        channel_info = created_channels[after.channel.id]
+    if after.channel and after.channel.id in channel_registry:
+        record = channel_registry.get(after.channel.id)
         
         # 자동 생성된 채널은 실제 사용 방지
-        if channel_info.get('auto_created'):
+        if record.auto_created:
             try:
                 # 자동 생성 채널에서 사용자를 내보냄
-                await member.move_to(None)
-                logger.info(f"🚫 자동 생성 채널에서 사용자 추방: {member.display_name}")
+                await rest_scheduler.submit(
+                    'move_member', member.guild.id, PRIORITY_MOVE, lambda: member.move_to(None)
+                )
+                logger.info("🚫 자동 생성 채널에서 사용자 추방: %s", member.display_name,
+                            extra={'event': 'auto_channel_kick', 'guild': member.guild.id, 'channel': after.channel.id, 'user': member.id})
             except:
                 pass
         else:
-            created_channels[after.channel.id]['has_been_used'] = True
+            mark_channel_used(after.channel.id)
+            channel_list_cache.update(record, after.channel)
+            if before.channel != after.channel:
+                analytics.on_join(member.guild.id)
+            logger.info("👋 임시 통화방 입장: %s → %s", member.display_name, after.channel.name,
+                        extra={'event': 'voice_join', 'guild': member.guild.id, 'channel': after.channel.id, 'user': member.id})
+            
+            # 대기 중인 삭제 작업이 있으면 취소
+            if rest_scheduler.drop(('dispose', after.channel.id)):
+                logger.info("↩️ 재입장으로 채널 삭제 취소됨: %s", after.channel.name,
+                            extra={'event': 'dispose_dropped', 'guild': member.guild.id, 'channel': after.channel.id, 'user': member.id})
             
             # 기존 타이머가 있으면 취소
-            if after.channel.id in channel_timers:
-                channel_timers[after.channel.id].cancel()
-                del channel_timers[after.channel.id]
-                logger.info(f"⏹️ 채널 입장으로 타이머 취소됨: {after.channel.name}")
+            if expiry_timers.cancel(after.channel.id):
+                logger.info("⏹️ 채널 입장으로 타이머 취소됨: %s", after.channel.name,
+                            extra={'event': 'timer_cancel', 'guild': member.guild.id, 'channel': after.channel.id, 'user': member.id})
     
-    # 사용자가 임시 통화방을 떠났을 때
-    if before.channel and before.channel.id in created_channels:
-        channel_info = created_channels[before.channel.id]
+    # 사용자가 임시 통화방을 떠났을 때 - 채널별 직렬 큐에서 settle 후 한 번만 판단
+    if before.channel and before.channel.id in channel_registry:
+        record = channel_registry.get(before.channel.id)
         
         # 자동 생성된 채널은 건드리지 않음
-        if channel_info.get('auto_created'):
+        if record.auto_created:
             return
+        channel_list_cache.update(record, before.channel)
+        if before.channel != after.channel:
+            analytics.on_leave(member.guild.id)
         
-        # 채널이 완전히 비었는지 확인
+        # 채널이 완전히 비었을 때만 판단 예약
         if len(before.channel.members) == 0:
-            if channel_info['has_been_used']:
-                # 사용된 적이 있는 채널은 즉시 삭제
-                try:
-                    await before.channel.delete()
-                    
-                    if before.channel.id in created_channels:
-                        del created_channels[before.channel.id]
-                    if before.channel.id in channel_timers:
-                        channel_timers[before.channel.id].cancel()
-                        del channel_timers[before.channel.id]
-                    
-                    logger.info(f"🗑️ 사용 후 빈 채널 즉시 삭제됨: {before.channel.name}")
-                    
-                except discord.NotFound:
-                    if before.channel.id in created_channels:
-                        del created_channels[before.channel.id]
-                    if before.channel.id in channel_timers:
-                        del channel_timers[before.channel.id]
-                except Exception as e:
-                    logger.error(f"❌ 채널 삭제 오류: {e}")
-            else:
-                # 사용된 적이 없는 채널은 30초 타이머 시작
-                if before.channel.id not in channel_timers:
-                    task = asyncio.create_task(delete_channel_after_delay(before.channel.id))
-                    channel_timers[before.channel.id] = task
-                    logger.info(f"⏰ 30초 타이머 시작됨: {before.channel.name}")
+            channel_settler.touch(before.channel.id)
+
+@bot.event
+async def on_guild_available(guild):
+    """장애 등으로 준비 시점에 없던 길드가 돌아오면 보류된 채널 복구"""
+    await restore_deferred(guild)
+
+@bot.event
+async def on_guild_remove(guild):
+    """봇이 나간 길드의 보류 항목은 더 이상 복구할 수 없으므로 저널에서 정리"""
+    for channel_id in deferred_restores.pop(guild.id, ()):
+        channel_journal.record_delete(channel_id)
+    analytics.forget(guild.id)
+
+@bot.event
+async def on_guild_channel_create(channel):
+    """봇 외부에서 만든 채널도 번호 인덱스에 반영"""
+    if isinstance(channel, discord.VoiceChannel):
+        channel_slots.track(channel)
+        # REST 응답보다 게이트웨이 이벤트가 늦게 오면 여기서 목록 필드를 채움
+        channel_list_cache.update(channel_registry.get(channel.id), channel)
+
+@bot.event
+async def on_guild_channel_update(before, after):
+    """생성자가 채널 이름을 바꾸면 목록 필드 갱신"""
+    if after.id in channel_registry and before.name != after.name:
+        channel_list_cache.update(channel_registry.get(after.id), after)
+
+@bot.event
+async def on_guild_channel_delete(channel):
+    """채널/카테고리 삭제 시 인덱스 정리"""
+    if isinstance(channel, discord.CategoryChannel):
+        channel_slots.forget_category(channel.id)
+    else:
+        channel_slots.release(channel.id)
+        channel_pool.discard(channel.id, channel.guild.id)
+
+def build_panel(guild_id):
+    """길드 설정으로 생성 패널 임베드와 버튼을 만듦"""
+    settings = guild_config.get(guild_id)
+    limits = settings.limits
+    if list(limits) == list(range(limits[0], limits[-1] + 1)) and len(limits) > 1:
+        sizes = f"{limits[0]}~{limits[-1]}인"
+    else:
+        sizes = ", ".join(f"{limit}인" for limit in limits)
+    embed = discord.Embed(
+        title="🎙️ 통화방 생성",
+        description="**아래 버튼을 클릭하여 통화방을 생성하세요!**\n\n"
+                   f"🔹 **{sizes}** 인원제한 통화방\n"
+                   f"🔹 **{settings.empty_timeout}초간** 비어있으면 자동 삭제\n"
+                   f"🔹 1인당 최대 **{ADMISSION_USER_CHANNELS}개** 통화방 생성 가능\n\n"
+                   "⚡ 버튼을 클릭하면 즉시 통화방이 생성됩니다!",
+        color=0x5865f2
+    )
+    embed.set_footer(text="🎯 원하는 인원수 버튼을 클릭하세요!")
+    return embed, VoiceChannelView(limits)
 
 # 슬래시 명령어들
 @bot.tree.command(name="패널", description="통화방 생성 패널을 현재 채널에 전송합니다. (관리자 전용)")
@@ -435,72 +3164,51 @@ async def send_panel(interaction: discord.Interaction):
         await interaction.response.send_message(embed=embed, ephemeral=True)
         return
     
-    embed = discord.Embed(
-        title="🎙️ 통화방 생성",
-        description="**아래 버튼을 클릭하여 통화방을 생성하세요!**\n\n"
-                   "🔹 **1~5인** 인원제한 통화방\n"
-                   "🔹 **30초간** 비어있으면 자동 삭제\n"
-                   "🔹 **무제한** 통화방 생성 가능\n\n"
-                   "⚡ 버튼을 클릭하면 즉시 통화방이 생성됩니다!",
-        color=0x5865f2
-    )
-    embed.set_footer(text="🎯 원하는 인원수 버튼을 클릭하세요!")
-    
-    view = VoiceChannelView()
+    embed, view = build_panel(interaction.guild_id)
     await interaction.response.send_message(embed=embed, view=view)
 
+class ChannelListView(discord.ui.View):
+    """/채널목록 페이지 넘김 버튼 - 누를 때마다 캐시에서 최신 페이지를 가져옴"""
+
+    def __init__(self, guild_id, page=0):
+        super().__init__(timeout=300)
+        self.guild_id = guild_id
+        self.pages = channel_list_cache.get_pages(guild_id)
+        # 그 사이 채널이 줄어 페이지 수가 바뀌었으면 마지막 페이지로
+        self.page = max(0, min(page, len(self.pages) - 1))
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.page >= len(self.pages) - 1
+
+    @property
+    def embed(self):
+        return self.pages[self.page]
+
+    async def show(self, interaction, page):
+        view = ChannelListView(self.guild_id, page)
+        await interaction.response.edit_message(embed=view.embed, view=view)
+
+    @discord.ui.button(label='이전', style=discord.ButtonStyle.secondary, emoji='◀️')
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, self.page - 1)
+
+    @discord.ui.button(label='다음', style=discord.ButtonStyle.secondary, emoji='▶️')
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, self.page + 1)
+
 @bot.tree.command(name="채널목록", description="현재 생성된 임시 통화방 목록을 확인합니다.")
 async def channel_list(interaction: discord.Interaction):
-    if not created_channels:
-        embed = discord.Embed(
-            title="📋 채널 목록",
-            description="현재 생성된 임시 통화방이 없습니다.",
-            color=0x888888
-        )
+    # 미리 렌더링된 페이지를 버전 확인 후 그대로 사용 (채널별 조회 없음)
+    view = ChannelListView(interaction.guild_id)
+    if len(view.pages) > 1:
+        await interaction.response.send_message(embed=view.embed, view=view, ephemeral=True)
     else:
-        embed = discord.Embed(
-            title="📋 현재 임시 통화방 목록",
-            color=0x00ff99
-        )
-        
-        user_channels = []  # 실제 사용자 채널만
-        
-        for channel_id, info in created_channels.items():
-            # 자동 생성된 채널은 목록에서 제외
-            if info.get('auto_created'):
-                continue
-                
-            try:
-                channel = info['channel']
-                creator = bot.get_user(info['creator'])
-                created_time = info['created_at'].strftime("%H:%M:%S")
-                member_count = len(channel.members)
-                
-                # 타이머 상태 확인
-                timer_status = "⏰ 타이머 작동중" if channel_id in channel_timers else "✅ 활성"
-                
-                embed.add_field(
-                    name=f"🔊 {channel.name}",
-                    value=f"생성자: {creator.display_name if creator else '알 수 없음'}\n"
-                          f"현재: {member_count}/{info['limit']}명\n"
-                          f"생성: {created_time}\n"
-                          f"상태: {timer_status}",
-                    inline=True
-                )
-                user_channels.append(info)
-            except:
-                continue
-        
-        if not user_channels:
-            embed.description = "현재 생성된 사용자 통화방이 없습니다."
-    
-    await interaction.response.send_message(embed=embed, ephemeral=True)
+        await interaction.response.send_message(embed=view.embed, ephemeral=True)
 
 @bot.tree.command(name="내채널삭제", description="내가 만든 통화방을 삭제합니다.")
 async def delete_my_channel(interaction: discord.Interaction):
     user_channels = [
-        info for info in created_channels.values() 
-        if info['creator'] == interaction.user.id and not info.get('auto_created')
+        channel for channel in map(channel_registry.channel, channel_registry.for_creator(interaction.user.id))
+        if channel is not None
     ]
     
     if not user_channels:
@@ -512,41 +3220,180 @@ async def delete_my_channel(interaction: discord.Interaction):
         await interaction.response.send_message(embed=embed, ephemeral=True)
         return
     
+    # 채널이 많아도 응답 제한에 걸리지 않도록 먼저 defer
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    
     try:
-        deleted_count = 0
-        for channel_info in user_channels:
-            try:
-                channel = channel_info['channel']
-                await channel.delete()
-                
-                if channel.id in created_channels:
-                    del created_channels[channel.id]
-                if channel.id in channel_timers:
-                    channel_timers[channel.id].cancel()
-                    del channel_timers[channel.id]
-                deleted_count += 1
-            except:
-                continue
+        # 사용자가 지우라고 한 채널은 풀로 되돌리지 않고 항상 삭제
+        deleted_count, failed_count = await delete_channels_bounded(
+            user_channels, priority=PRIORITY_CLICK, recycle=False
+        )
         
+        description = f"{deleted_count}개의 통화방이 삭제되었습니다."
+        if failed_count:
+            description += f"\n⚠️ {failed_count}개는 삭제하지 못했습니다."
         embed = discord.Embed(
             title="✅ 채널 삭제 완료",
-            description=f"{deleted_count}개의 통화방이 삭제되었습니다.",
-            color=0x51cf66
+            description=description,
+            color=0x51cf66 if not failed_count else 0xffa94d
         )
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await interaction.followup.send(embed=embed, ephemeral=True)
         
     except Exception as e:
+        logger.error(f"❌ 내 채널 삭제 오류: {e}")
         embed = discord.Embed(
             title="❌ 삭제 실패",
             description=f"통화방 삭제 중 오류가 발생했습니다.",
             color=0xff0000
         )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
+def format_setting(value):
+    return ", ".join(map(str, value)) if isinstance(value, tuple) else str(value)
+
+@bot.tree.command(name="설정", description="이 서버의 통화방 설정을 확인하거나 변경합니다. (관리자 전용)")
+@app_commands.rename(key="항목", value="값")
+@app_commands.describe(key="바꿀 설정 항목", value="새 값 ('기본값'을 입력하면 초기화, 비우면 현재 값 확인)")
+@app_commands.choices(key=[
+    app_commands.Choice(name=f"{description} ({key})", value=key)
+    for key, (_, _, description) in GUILD_SETTINGS.items()
+])
+async def guild_settings_cmd(interaction: discord.Interaction, key: app_commands.Choice[str] = None, value: str = None):
+    if not interaction.user.guild_permissions.administrator:
+        embed = discord.Embed(
+            title="❌ 권한 없음",
+            description="이 명령어는 관리자만 사용할 수 있습니다.",
+            color=0xff0000
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        return
+    
+    guild_id = interaction.guild_id
+    if key is not None and value is not None:
+        name, key = key.name, key.value
+        try:
+            if value.strip() == '기본값':
+                guild_config.reset(guild_id, key)
+            else:
+                guild_config.set(guild_id, key, value)
+        except ValueError as e:
+            embed = discord.Embed(title="❌ 잘못된 값", description=f"{name}: {e}", color=0xff0000)
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+        
+        value = format_setting(getattr(guild_config.get(guild_id), key))
+        description = f"**{name}** → `{value}`"
+        if key == 'limits':
+            description += "\n기존 패널에는 이전 버튼이 남아 있으니 `/패널`을 다시 보내주세요."
+        embed = discord.Embed(title="⚙️ 설정 변경됨", description=description, color=0x51cf66)
+        logger.info(f"⚙️ 길드 설정 변경: {interaction.guild.name} {key}={value} by {interaction.user.display_name}")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        return
+    
+    settings = guild_config.get(guild_id)
+    embed = discord.Embed(title="⚙️ 통화방 설정", color=0x5865f2)
+    for setting, (_, _, description) in GUILD_SETTINGS.items():
+        if key is not None and setting != key.value:
+            continue
+        marker = "" if setting in settings.overrides else " (기본값)"
+        embed.add_field(name=f"{description} ({setting})", value=f"`{format_setting(getattr(settings, setting))}`{marker}", inline=False)
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+def format_duration(seconds):
+    if seconds is None:
+        return "-"
+    if seconds >= 3600:
+        return f"{seconds / 3600:g}시간"
+    if seconds >= 60:
+        return f"{seconds / 60:g}분"
+    return f"{seconds:g}초"
+
+@bot.tree.command(name="통계", description="임시 통화방 사용 통계를 확인합니다. (관리자 전용)")
+async def analytics_cmd(interaction: discord.Interaction):
+    if not interaction.user.guild_permissions.administrator:
+        embed = discord.Embed(
+            title="❌ 권한 없음",
+            description="이 명령어는 관리자만 사용할 수 있습니다.",
+            color=0xff0000
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        return
+    
+    snapshot = analytics.snapshot(interaction.guild.id, 24)
+    if snapshot is None:
+        embed = discord.Embed(
+            title="📈 통화방 사용 통계",
+            description="아직 이 서버에서 기록된 임시 통화방이 없습니다.",
+            color=0x00ff99
+        )
         await interaction.response.send_message(embed=embed, ephemeral=True)
+        return
+    totals = snapshot['totals']
+    used, unused = snapshot['lifetime']['used'], snapshot['lifetime']['unused']
+    unused_ratio = f"{totals['unused_ratio'] * 100:.0f}%" if totals['unused_ratio'] is not None else "-"
+    
+    embed = discord.Embed(
+        title="📈 통화방 사용 통계",
+        description=f"집계 시작: {snapshot['since'][:16].replace('T', ' ')}\n"
+                   f"생성 {totals['created']}개 / 삭제 {totals['deleted']}개 / "
+                   f"한 번도 안 쓰고 삭제 {totals['unused']}개 ({unused_ratio})\n"
+                   f"현재 채널 {totals['current_channels']}개, 인원 {totals['current_occupants']}명 "
+                   f"(최대 {totals['peak_channels']}개 / {totals['peak_occupants']}명)",
+        color=0x00ff99
+    )
+    embed.add_field(
+        name="⏱️ 채널 수명",
+        value=f"사용됨: P50 {format_duration(used['p50_s'])} / P90 {format_duration(used['p90_s'])} ({used['count']}개)\n"
+              f"미사용: P50 {format_duration(unused['p50_s'])} ({unused['count']}개)",
+        inline=False
+    )
+    
+    by_limit = sorted(snapshot['by_limit'].items(), key=lambda item: -item[1]['created'])[:5]
+    if by_limit:
+        embed.add_field(
+            name="👥 인기 인원",
+            value="\n".join(f"{limit}인: {counts['created']}개 (미사용 {counts['unused']}개)" for limit, counts in by_limit),
+            inline=True
+        )
+    
+    busiest = sorted(range(24), key=lambda hour: -snapshot['peak_by_hour_of_day'][hour])[:3]
+    if snapshot['peak_by_hour_of_day'][busiest[0]]:
+        embed.add_field(
+            name="🕒 붐비는 시간대",
+            value="\n".join(f"{hour}시: 최대 {snapshot['peak_by_hour_of_day'][hour]}개" for hour in busiest),
+            inline=True
+        )
+    
+    recent = snapshot['hourly'][-6:]
+    if recent:
+        embed.add_field(
+            name="📊 최근 시간별 (생성/삭제/최대 동시)",
+            value="\n".join(f"{row['hour'][11:16]} {row['created']}/{row['deleted']}/{row['peak_channels']}" for row in recent),
+            inline=False
+        )
+    embed.set_footer(text="이 서버 기준")
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+async def fetch_cluster_status():
+    """클러스터 모드면 supervisor에서 전체 워커 집계를 가져옴"""
+    if not CLUSTER_SUPERVISOR_URL:
+        return None
+    try:
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=2)) as session:
+            async with session.get(f"{CLUSTER_SUPERVISOR_URL}/cluster") as response:
+                return await response.json()
+    except Exception as e:
+        logger.warning(f"⚠️ 클러스터 상태 조회 실패: {e}")
+        return None
 
 @bot.tree.command(name="상태", description="봇 상태를 확인합니다.")
 async def bot_status_cmd(interaction: discord.Interaction):
-    user_channels = len([ch for ch in created_channels.values() if not ch.get('auto_created')])
-    auto_channels = len([ch for ch in created_channels.values() if ch.get('auto_created')])
+    user_channels = channel_registry.user_count
+    auto_channels = channel_registry.auto_count
+    timer_stats = expiry_timers.stats()
+    rest_stats = rest_scheduler.stats()
+    total_latency = click_latency.percentiles()['total']
+    cluster = await fetch_cluster_status()
     
     embed = discord.Embed(
         title="🤖 봇 상태",
@@ -557,7 +3404,15 @@ async def bot_status_cmd(interaction: discord.Interaction):
                    f"마지막 핑: {bot_status['last_ping'].strftime('%H:%M:%S')}\n"
                    f"총 핑 횟수: {bot_status['total_pings']}회\n"
                    f"자동 채널 생성: {bot_status['auto_channels_created']}개\n"
-                   f"마지막 자동 채널: {bot_status['last_auto_channel'].strftime('%H:%M:%S')}",
+                   f"마지막 자동 채널: {bot_status['last_auto_channel'].strftime('%H:%M:%S')}\n"
+                   f"게이트웨이 지연: {bot_status['latency_ms']}ms / 루프 지연: {bot_status['loop_lag_ms']}ms\n"
+                   f"대기 타이머: {timer_stats['pending']}개 "
+                   f"(평균 지연 {timer_stats['avg_late_ms']}ms / 최대 {timer_stats['max_late_ms']}ms)\n"
+                   f"REST 대기열: {rest_stats['queue_depth']}개 / 429: {rest_stats['rate_limited']}회 "
+                   f"(클릭 평균 대기 {rest_stats['wait_ms']['click']['avg']}ms)\n"
+                   f"채널 생성 응답: P50 {total_latency['p50']}ms / P99 {total_latency['p99']}ms"
+                   + (f"\n클러스터: 워커 {cluster['alive_workers']}/{cluster['workers']}개, "
+                      f"길드 {cluster['guilds']}개, 채널 {cluster['active_channels']}개" if cluster else ""),
         color=0x00ff99
     )
     await interaction.response.send_message(embed=embed, ephemeral=True)
@@ -568,18 +3423,7 @@ async def send_panel_text(ctx):
         await ctx.send("❌ 관리자만 사용할 수 있는 명령어입니다.", delete_after=5)
         return
     
-    embed = discord.Embed(
-        title="🎙️ 통화방 생성",
-        description="**아래 버튼을 클릭하여 통화방을 생성하세요!**\n\n"
-                   "🔹 **1~5인** 인원제한 통화방\n"
-                   "🔹 **30초간** 비어있으면 자동 삭제\n"
-                   "🔹 **무제한** 통화방 생성 가능\n\n"
-                   "⚡ 버튼을 클릭하면 즉시 통화방이 생성됩니다!",
-        color=0x5865f2
-    )
-    embed.set_footer(text="🎯 원하는 인원수 버튼을 클릭하세요!")
-    
-    view = VoiceChannelView()
+    embed, view = build_panel(ctx.guild.id)
     await ctx.send(embed=embed, view=view)
     
     try:
@@ -587,6 +3431,32 @@ async def send_panel_text(ctx):
     except:
         pass
 
+if LEAN_GATEWAY:
+    # 메시지 내용 인텐트가 없으므로 텍스트 명령어는 끄고 /패널만 사용
+    bot.remove_command(send_panel_text.name)
+
+startup.mark('imported')
+
+async def run_bot(token):
+    """웹 서버와 봇을 같은 이벤트 루프에서 실행"""
+    # /livez는 로그인 전부터 응답 (/readyz는 상태 복구가 끝날 때까지 503)
+    with startup.phase('web'):
+        web_runner = await start_web()
+    try:
+        async with bot:
+            with startup.phase('login'):
+                await bot.login(token)
+            if lease is not None:
+                # 로그인(토큰 검증, HTTP 세션)은 대기 중에 미리 끝내 두고 리스를 잡으면 바로 게이트웨이 연결
+                await wait_for_lease()
+            startup.mark('gateway_connect')
+            await bot.connect()
+        if lease is not None and lease.lost:
+            # 다시 시작되면 새 리더의 스탠바이로 대기
+            raise LeaseLost("리스를 잃어 종료합니다")
+    finally:
+        await web_runner.cleanup()
+
 # 봇 실행
 if __name__ == "__main__":
     TOKEN = os.getenv('DISCORD_BOT_TOKEN')
@@ -597,6 +3467,10 @@ if __name__ == "__main__":
     else:
         logger.info("🚀 봇을 시작합니다...")
         try:
-            bot.run(TOKEN, log_handler=None)  # 로깅 중복 방지
+            asyncio.run(run_bot(TOKEN))
+        except KeyboardInterrupt:
+            pass
         except Exception as e:
             logger.error(f"❌ 봇 실행 오류: {e}")
+            # 비정상 종료 코드로 끝내야 클러스터 supervisor/호스팅이 다시 시작함
+            sys.exit(1)
@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import SlotAllocator
+
+
+def test_acquire_returns_lowest_free_number():
+    slots = SlotAllocator()
+    assert [slots.acquire() for _ in range(3)] == [1, 2, 3]
+    slots.release(2)
+    slots.release(1)
+    assert slots.acquire() == 1
+    assert slots.acquire() == 2
+    assert slots.acquire() == 4
+
+
+def test_release_of_unused_number_is_ignored():
+    slots = SlotAllocator()
+    slots.acquire()
+    slots.release(5)
+    slots.release(1)
+    slots.release(1)
+    assert slots.acquire() == 1
+    assert slots.acquire() == 2
+
+
+def test_mark_skips_existing_numbers_in_order():
+    slots = SlotAllocator()
+    slots.mark(2)
+    slots.mark(4)
+    assert [slots.acquire() for _ in range(3)] == [1, 3, 5]
+    slots.release(4)
+    assert slots.acquire() == 4
+
+
+def test_mark_below_next_number_takes_released_slot():
+    slots = SlotAllocator()
+    for _ in range(3):
+        slots.acquire()
+    slots.release(2)
+    slots.mark(2)
+    assert slots.acquire() == 4
+
+
+def test_mark_huge_number_does_not_fill_the_gap():
+    slots = SlotAllocator()
+    started = time.perf_counter()
+    slots.mark(999_999_999)
+    assert time.perf_counter() - started < 0.01
+    assert slots.free == []
+    assert slots.acquire() == 1
+    slots.release(999_999_999)
+    assert slots.used == {1}
+    assert slots.acquire() == 2